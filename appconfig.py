@@ -10,6 +10,46 @@ class Settings(BaseSettings):
     DATABASE_URL: str
     CACHE_SERVER_URL: str        
     CACHE_TTL: str = "30m"    
+    # Cached responses are fresh for CACHE_TTL, then served stale for CACHE_STALE_TTL more while refreshed in background ("0" disables)
+    CACHE_STALE_TTL: str = "1h"
+    COUNT_CACHE_TTL: str = "6h"
+    # Header listing the tables a cached response was built from, for the CDN to purge it after a load ("" disables)
+    SURROGATE_KEY_HEADER: str = "Surrogate-Key"
+    # In-process cache (L1) of each worker in front of Redis: entries kept and their maximum age in seconds (0 disables)
+    CACHE_L1_SIZE: int = 1000
+    CACHE_L1_TTL: int = 60
+    # Lock electing the worker that recomputes a missed key; the others poll for its result meanwhile (seconds)
+    CACHE_LOCK_TTL: int = 30
+    CACHE_LOCK_POLL_INTERVAL: float = 0.05
+    # Data version of each table, embedded in the cache keys: statement triggers bumping it on every change
+    # (otherwise the data load bumps it, see src/versions.py), and reload interval should a notification be lost (seconds)
+    DATA_VERSION_TRIGGERS: bool = False
+    DATA_VERSION_POLL_INTERVAL: int = 60
+    # Cache warm-up at startup and after each data load: replays the most frequent requests of the last window
+    # (seconds) found in the access log and in the requests served, within a concurrency and a time budget (0 disables)
+    WARMUP_TOP_N: int = 200
+    WARMUP_WINDOW: int = 86400
+    WARMUP_CONCURRENCY: int = 4
+    WARMUP_TIME_BUDGET: int = 120
+    WARMUP_ACCESS_LOG: str = "logs/api_access.log"
+    # Compression of the values stored in Redis larger than the threshold (bytes): "zstd", "lz4" or "" (disabled)
+    CACHE_COMPRESSION: str = "zstd"
+    CACHE_COMPRESSION_LEVEL: int = 3
+    CACHE_COMPRESSION_THRESHOLD: int = 1024
+    # gzip/brotli compression of the responses of at least RESPONSE_COMPRESSION_MIN_SIZE bytes, negotiated by Accept-Encoding.
+    # Cached responses are compressed once, when cached; the others with gzip on the fly, at RESPONSE_GZIP_LEVEL
+    RESPONSE_COMPRESSION: bool = True
+    RESPONSE_COMPRESSION_MIN_SIZE: int = 1024
+    RESPONSE_GZIP_LEVEL: int = 6
+    # Prepared statements kept per database connection (0 disables the reuse)
+    PREPARED_STATEMENT_CACHE_SIZE: int = 500
+    # Build the indexes of the query filters at startup (requires privileges to create extensions)
+    MANAGE_INDEXES: bool = True
+    # Accent-insensitive text filters, backed by the unaccent extension installed in the public schema
+    UNACCENT_SEARCH: bool = False
+    # Create the aggregate materialized views at startup and refresh them every interval (seconds, 0 disables)
+    MANAGE_AGGREGATES: bool = True
+    AGGREGATE_REFRESH_INTERVAL: int = 21600
     APP_NAME: str
     APP_DESCRIPTION: str
     APP_TAGS: list = [
@@ -57,10 +97,50 @@ class Settings(BaseSettings):
             "name": "Finalidade Especial",
             "description": "Dados relativos a finalidades especiais.",            
         },
+        {
+            "name": "Agregados",
+            "description": "Totais pré-calculados, agrupados pelas dimensões informadas.",
+        },
+        {
+            "name": "Consulta em Lote",
+            "description": "Várias consultas, a quaisquer recursos, executadas concorrentemente em uma só requisição.",
+        },
     ]
     DEFAULT_PAGE_SIZE: int = 100
     MAX_PAGE_SIZE: int = 200
+    # Sub-queries accepted by POST /lote and how many of them run at the same time
+    MAX_BATCH_QUERIES: int = 20
+    BATCH_CONCURRENCY: int = 4
+    # Upper bound of values informed in a single multi-value filter
+    MAX_FILTER_VALUES: int = 500
+    # Rows fetched per round-trip from the server-side cursor of the export endpoints
+    EXPORT_BATCH_SIZE: int = 5000
+    EXPORT_FORMAT_DESCRIPTION: str = ("Formato do arquivo exportado: 'ndjson' (um objeto JSON por linha), 'csv' "
+                                      "(valores separados por vírgula, com cabeçalho), 'parquet' (arquivo colunar comprimido) "
+                                      "ou 'arrow' (fluxo Apache Arrow IPC).")
+    # Compression codec of the Parquet exports (zstd, snappy, gzip, brotli, lz4 or none)
+    PARQUET_COMPRESSION: str = "zstd"
+    COUNT_DESCRIPTION: str = ("Estratégia de contagem do total de registros: 'exata' (contagem completa), "
+                              "'estimada' (estimativa do planejador do PostgreSQL), 'cache' (contagem exata memorizada por filtro) "
+                              "ou 'nenhuma' (sem contagem; 'total_items' e 'total_pages' retornam nulos).")
     ERROR_MESSAGE_NO_PARAMS: str = "Nenhum parâmetro de consulta foi informado."
     ERROR_MESSAGE_INTERNAL: str = "Erro Interno Inesperado."
+    ERROR_MESSAGE_INVALID_CURSOR: str = "Cursor de paginação inválido."
+    ERROR_MESSAGE_NOT_FOUND: str = "Registro não encontrado."
+    ERROR_MESSAGE_INVALID_FIELDS: str = "Campos inexistentes:"
+    ERROR_MESSAGE_AGGREGATE_UNAVAILABLE: str = "Agregados em preparação. Tente novamente em alguns minutos."
+    # Levels below the root loaded by the tree endpoints (programa down to historico de pagamento)
+    MAX_EXPAND_DEPTH: int = 5
+    EXPAND_DESCRIPTION: str = ("Quantidade de níveis de registros dependentes a incluir abaixo do registro consultado. "
+                               "Cada nível é carregado em lote, com uma consulta por tipo de registro dependente.")
+    GROUP_BY_DESCRIPTION: str = ("Dimensões pelas quais os totais são agrupados, repetindo o parâmetro: "
+                                 "?agrupar_por=dim1&agrupar_por=dim2. Se omitido, agrupa por todas as dimensões.")
+    FIELDS_DESCRIPTION: str = ("Campos a incluir na resposta, repetindo o parâmetro ou separados por vírgula: "
+                               "?campos=campo1,campo2. A chave primária é sempre incluída. Se omitido, retorna todos os campos.")
+    CURSOR_DESCRIPTION: str = ("Cursor para paginação por chave (keyset), indicada para percorrer tabelas inteiras. "
+                               "Informe 'inicio' para obter a primeira página e, nas seguintes, o valor de 'proximo_cursor' "
+                               "da resposta anterior. Quando informado, o parâmetro 'pagina' é ignorado e os filtros passam a ser opcionais. "
+                               "O total de registros é contado apenas na primeira página; nas seguintes, 'total_items' e "
+                               "'total_pages' retornam nulos.")
     STATS_USER: str 
     STATS_PASSWORD: str
\ No newline at end of file
@@ -1,18 +1,22 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request, status, Depends, WebSocket
+from fastapi import FastAPI, HTTPException, Request, status, Depends, Query, WebSocket
 from fastapi.websockets import WebSocketDisconnect
 import orjson
 from fastapi.responses import RedirectResponse, ORJSONResponse, HTMLResponse
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.staticfiles import StaticFiles
+from fastapi.middleware.gzip import GZipMiddleware
 import logging
 from cashews.contrib.fastapi import (
-    CacheEtagMiddleware,
     CacheRequestControlMiddleware    
 )
 from collections import defaultdict
 from src.database import Database
-from src.cache import setup_cache
+from src.cache import setup_cache, cache_stats, bind_cached_routes, CacheControlMiddleware
+from src.indexes import index_report
+from src.aggregates import refresh_aggregates_periodically
+from src.versions import data_versions
+from src.warmup import record_request, warm_cache, warm_cache_at_startup, warmup_stats
 from src.utils import (
     reset_minute_counters, 
     verify_admin, 
@@ -25,6 +29,7 @@ import psutil
 import json
 import time
 import datetime as dt
+from typing import List, Optional
 
 
 # Importando Rotas
@@ -39,6 +44,8 @@ from src.routers.plano_trabalho_especial import pt_router
 from src.routers.executor_especial import ex_router
 from src.routers.meta_especial import me_router
 from src.routers.finalidade_especial import fe_router
+from src.routers.lote import lote_router
+from src.routers.agregados import agregados_router
 
 # Configuração do logger
 logging.basicConfig(level=logging.INFO)
@@ -75,8 +82,20 @@ async def lifespan(app: FastAPI):
     try:
         # Inicializa o Banco de Dados
         await db.init_db()        
+        # Acompanha as versões dos dados, que invalidam as respostas em cache após cada carga
+        versions_task = asyncio.create_task(db.track_data_versions())
+        # Cria em segundo plano os índices dos filtros de consulta
+        if config.MANAGE_INDEXES:
+            index_task = asyncio.create_task(db.ensure_indexes())
+        # Cria e atualiza periodicamente as visões materializadas dos agregados
+        if config.MANAGE_AGGREGATES:
+            aggregates_task = asyncio.create_task(
+                refresh_aggregates_periodically(db.engine, config.AGGREGATE_REFRESH_INTERVAL))
         # Configure o cache
         setup_cache(config)
+        # Aquece o cache com as consultas mais frequentes, na inicialização e após cada carga de dados
+        warmup_task = asyncio.create_task(warm_cache_at_startup(app))
+        data_versions.subscribe(lambda: warm_cache(app))
         # background task to Update allowed paths for stats
         update_paths_task = asyncio.create_task(update_allowed_paths(logger))
         # background task to reset the "last minute" counters every 60 seconds.
@@ -92,6 +111,12 @@ async def lifespan(app: FastAPI):
     yield
     # load after the app has finished
     # Shutdown: Cancel the background tasks
+    versions_task.cancel()
+    warmup_task.cancel()
+    if config.MANAGE_INDEXES:
+        index_task.cancel()
+    if config.MANAGE_AGGREGATES:
+        aggregates_task.cancel()
     update_paths_task.cancel()
     reset_task.cancel()
     save_task.cancel()
@@ -113,8 +138,12 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 app.mount(f"{ROOTPATH}/static", StaticFiles(directory="static"), name="static_prefixed")
 
 # Incluindo Middlewares
-app.add_middleware(CacheEtagMiddleware)
 app.add_middleware(CacheRequestControlMiddleware)
+app.add_middleware(CacheControlMiddleware)
+# Compressão gzip das respostas não guardadas em cache (as demais já estão comprimidas)
+if config.RESPONSE_COMPRESSION:
+    app.add_middleware(GZipMiddleware, minimum_size=config.RESPONSE_COMPRESSION_MIN_SIZE,
+                       compresslevel=config.RESPONSE_GZIP_LEVEL)
 
 
 @app.middleware("http")
@@ -125,6 +154,8 @@ async def track_requests(request: Request, call_next):
     
     # Update stats
     _path = request.url.path
+    if request.method == "GET" and response.status_code == status.HTTP_200_OK:
+        record_request(request.scope["path"], request.scope["query_string"].decode("latin-1"))
     
     # If allowed_stats_paths is empty, track all paths
     # Otherwise, only track paths in the allowed list
@@ -153,6 +184,10 @@ app.include_router(pt_router)
 app.include_router(ex_router)
 app.include_router(me_router)
 app.include_router(fe_router)
+app.include_router(lote_router)
+app.include_router(agregados_router)
+# Os endpoints em cache guardam as respostas já codificadas pelas suas rotas
+bind_cached_routes(app)
 
 
 @app.get("/docs", include_in_schema=False)
@@ -459,6 +494,38 @@ async def get_stats(username: str = Depends(verify_admin)):
     return HTMLResponse(content=html_content, status_code=status.HTTP_200_OK)
 
 
+@app.get("/stats/database", include_in_schema=False)
+async def get_database_stats(username: str = Depends(verify_admin)):
+    return {"prepared_statements": db.statement_cache_stats()}
+
+
+@app.get("/stats/cache", include_in_schema=False)
+async def get_cache_stats(username: str = Depends(verify_admin)):
+    return {**cache_stats(), "warmup": warmup_stats}
+
+
+@app.get("/stats/indexes", include_in_schema=False)
+async def get_index_report(username: str = Depends(verify_admin)):
+    return await index_report(db.engine)
+
+
+@app.get("/stats/versions", include_in_schema=False)
+async def get_data_versions(username: str = Depends(verify_admin)):
+    return data_versions.versions
+
+
+@app.post("/versoes", include_in_schema=False)
+async def bump_data_versions(tabela: Optional[List[str]] = Query(None), username: str = Depends(verify_admin)):
+    """
+    Bumps the data version of the given tables (all of them by default) at the end of a data load,
+    invalidating the cached responses built from them
+    """
+    try:
+        return await data_versions.bump(db.engine, tabela)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+
 @app.websocket("/ws")
 async def stats_ws(websocket: WebSocket):
     await websocket.accept()
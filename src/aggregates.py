@@ -0,0 +1,194 @@
+from sqlalchemy import BigInteger, Column, Float, Integer, MetaData, Table, any_, bindparam, case, cast, extract, func, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlmodel import select
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Tuple
+import asyncio
+import logging
+from appconfig import Settings
+from src import models
+from src.versions import data_versions
+
+config = Settings()
+logger = logging.getLogger(__name__)
+
+# Advisory lock ensuring a single worker refreshes the views at a time
+AGGREGATE_LOCK_KEY = 872_341_014
+# Prefix of the cached responses of the aggregate endpoints
+AGGREGATE_CACHE_PREFIX = "agregados"
+
+# Tables of the materialized views, kept apart from SQLModel.metadata so create_all leaves them alone
+_metadata = MetaData(schema=models.db_schema)
+
+
+@dataclass
+class AggregateView:
+    """
+    Materialized view holding the totals of a grouping query over the models. The endpoints
+    re-aggregate its rows by any subset of the dimensions, summing the measures
+    """
+    name: str
+    query: select
+    dimensions: Tuple[str, ...]
+    table: Table = field(init=False)
+    _statements: Dict[Tuple[Tuple[str, ...], FrozenSet[Tuple[str, bool]]], select] = field(default_factory=dict, init=False)
+
+    def __post_init__(self):
+        self.table = Table(self.name, _metadata,
+                           *[Column(column.name, column.type) for column in self.query.selected_columns])
+
+    @property
+    def measures(self) -> Tuple[str, ...]:
+        return tuple(column.name for column in self.table.columns if column.name not in self.dimensions)
+
+    def create_statements(self) -> Tuple[str, ...]:
+        definition = self.query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+        return (
+            f"CREATE MATERIALIZED VIEW IF NOT EXISTS {models.db_schema}.{self.name} AS {definition}",
+            # REFRESH ... CONCURRENTLY requires a unique index over plain columns
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {self.name}_key "
+            f"ON {models.db_schema}.{self.name} ({', '.join(self.dimensions)})",
+        )
+
+    def statement(self, group_by: Tuple[str, ...], filters: dict) -> select:
+        """
+        Returns the select summing the measures by the given dimensions, for the given filters
+        (lists of values become a single `= ANY(array)` predicate)
+        """
+        shape = frozenset((name, isinstance(value, list)) for name, value in filters.items())
+        query = self._statements.get((group_by, shape))
+        if query is None:
+            columns = self.table.columns
+            predicates = [columns[name] == any_(bindparam(name, type_=ARRAY(columns[name].type))) if multiple
+                          else columns[name] == bindparam(name, type_=columns[name].type)
+                          for name, multiple in sorted(shape)]
+            query = (select(*[columns[name] for name in group_by],
+                            *[cast(func.sum(columns[name]), columns[name].type).label(name) for name in self.measures])
+                     .where(*predicates)
+                     .group_by(*[columns[name] for name in group_by])
+                     .order_by(*[columns[name] for name in group_by]))
+            self._statements[(group_by, shape)] = query
+        return query
+
+
+def _empenho_uf_ano() -> select:
+    empenho, plano_acao = models.EmpenhoEspecial, models.PlanoAcaoEspecial
+    ano = cast(extract("year", empenho.data_emissao_empenho), Integer)
+    return (select(empenho.uf_beneficiario_empenho,
+                   ano.label("ano_emissao_empenho"),
+                   plano_acao.id_programa,
+                   cast(func.count(), BigInteger).label("quantidade_empenhos"),
+                   cast(func.sum(empenho.valor_empenho), Float).label("valor_empenho"))
+            .join(plano_acao, plano_acao.id_plano_acao == empenho.id_plano_acao)
+            .group_by(empenho.uf_beneficiario_empenho, ano, plano_acao.id_programa))
+
+
+def _plano_acao_parlamentar() -> select:
+    plano_acao = models.PlanoAcaoEspecial
+    dimensions = (plano_acao.codigo_parlamentar_emenda_plano_acao, plano_acao.nome_parlamentar_emenda_plano_acao,
+                  plano_acao.ano_plano_acao, plano_acao.uf_beneficiario_plano_acao)
+    return (select(*dimensions,
+                   cast(func.count(), BigInteger).label("quantidade_planos_acao"),
+                   cast(func.sum(plano_acao.valor_custeio_plano_acao), Float).label("valor_custeio_plano_acao"),
+                   cast(func.sum(plano_acao.valor_investimento_plano_acao), Float).label("valor_investimento_plano_acao"))
+            .group_by(*dimensions))
+
+
+def _pagamento_programa() -> select:
+    programa, plano_acao = models.ProgramaEspecial, models.PlanoAcaoEspecial
+    empenho, documento_habil = models.EmpenhoEspecial, models.DocumentoHabilEspecial
+    ordem_pagamento = models.OrdemPagamentoOrdemBancariaEspecial
+    # OBs counted per DH before the join, so a DH with several OBs is summed once
+    ordens = (select(ordem_pagamento.id_dh, func.count().label("quantidade"))
+              .group_by(ordem_pagamento.id_dh).subquery("ordens"))
+    dimensions = (programa.id_programa, programa.codigo_programa, programa.ano_programa)
+    return (select(*dimensions,
+                   cast(func.count(documento_habil.id_dh), BigInteger).label("quantidade_documentos_habeis"),
+                   cast(func.coalesce(func.sum(documento_habil.valor_dh), 0), Float).label("valor_dh"),
+                   cast(func.coalesce(func.sum(documento_habil.valor_rateio_dh), 0), Float).label("valor_rateio_dh"),
+                   cast(func.coalesce(func.sum(ordens.c.quantidade), 0), BigInteger).label("quantidade_ordens_bancarias"),
+                   cast(func.coalesce(func.sum(case((ordens.c.quantidade > 0, documento_habil.valor_dh), else_=0)), 0),
+                        Float).label("valor_dh_com_ordem_bancaria"))
+            .join(plano_acao, plano_acao.id_programa == programa.id_programa)
+            .join(empenho, empenho.id_plano_acao == plano_acao.id_plano_acao)
+            .join(documento_habil, documento_habil.id_empenho == empenho.id_empenho)
+            .outerjoin(ordens, ordens.c.id_dh == documento_habil.id_dh)
+            .group_by(*dimensions))
+
+
+AGGREGATES: Dict[str, AggregateView] = {
+    "empenho_uf_ano": AggregateView("agregado_empenho_uf_ano", _empenho_uf_ano(),
+                                    ("uf_beneficiario_empenho", "ano_emissao_empenho", "id_programa")),
+    "plano_acao_parlamentar": AggregateView("agregado_plano_acao_parlamentar", _plano_acao_parlamentar(),
+                                            ("codigo_parlamentar_emenda_plano_acao", "nome_parlamentar_emenda_plano_acao",
+                                             "ano_plano_acao", "uf_beneficiario_plano_acao")),
+    "pagamento_programa": AggregateView("agregado_pagamento_programa", _pagamento_programa(),
+                                        ("id_programa", "codigo_programa", "ano_programa")),
+}
+
+
+async def get_aggregate_data(view: AggregateView, group_by: List[str], filters: dict, dbsession: AsyncSession) -> List[dict]:
+    """
+    Sums the measures of an aggregate view by the requested dimensions (all of them when none is
+    informed), keeping the rows matching the informed dimension filters
+    """
+    group_by = tuple(dict.fromkeys(group_by)) if group_by else view.dimensions
+    filters = {name: (value[0] if isinstance(value, list) and len(value) == 1 else value)
+               for name, value in filters.items() if value not in (None, "", [])}
+    result = await dbsession.execute(view.statement(group_by, filters), filters)
+    return [dict(row) for row in result.mappings()]
+
+
+async def ensure_aggregates(engine: AsyncEngine):
+    """
+    Creates the materialized views that do not exist yet, populating them
+    """
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": AGGREGATE_LOCK_KEY})
+        try:
+            for view in AGGREGATES.values():
+                for statement in view.create_statements():
+                    await conn.execute(text(statement))
+        finally:
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": AGGREGATE_LOCK_KEY})
+
+
+async def refresh_aggregates(engine: AsyncEngine) -> bool:
+    """
+    Recomputes the materialized views from the current data and bumps their data versions, which
+    invalidates the cached aggregate responses. Returns False, doing nothing, when another worker
+    is already refreshing them
+    """
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        locked = await conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": AGGREGATE_LOCK_KEY})
+        if not locked:
+            return False
+        try:
+            for view in AGGREGATES.values():
+                logger.info(f"Atualizando a visão materializada {view.name}...")
+                # Concurrently, so the endpoints keep reading the previous totals meanwhile
+                await conn.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {models.db_schema}.{view.name}"))
+        finally:
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": AGGREGATE_LOCK_KEY})
+    await data_versions.bump(engine, [view.name for view in AGGREGATES.values()])
+    return True
+
+
+async def refresh_aggregates_periodically(engine: AsyncEngine, interval: int):
+    """
+    Creates the views and refreshes them every `interval` seconds (never, when zero)
+    """
+    try:
+        await ensure_aggregates(engine)
+    except Exception as e:
+        logger.error(f"Erro ao criar as visões materializadas: {str(e)}")
+    while interval:
+        await asyncio.sleep(interval)
+        try:
+            await refresh_aggregates(engine)
+        except Exception as e:
+            logger.error(f"Erro ao atualizar as visões materializadas: {str(e)}")
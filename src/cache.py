@@ -1,7 +1,621 @@
-# src/cache.py
 from cashews import cache
+from cashews.backends.memory import Memory
+from cashews.backends.redis import Redis
+from cashews.backends.redis.client_side import BcastClientSide, _empty, _empty_in_redis
+from cashews.ttl import ttl_to_seconds
+from cashews.wrapper.backend_settings import register_backend
+from cashews.commands import Command
+from cashews.picklers import Pickler
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import Response, status
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.routing import APIRoute, serialize_response
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from collections import defaultdict
+from contextlib import AsyncExitStack
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from enum import Enum
+from functools import wraps
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional, Sequence, Tuple
+import asyncio
+import dataclasses
+import hashlib
+import logging
+import orjson
+import os
+import pyarrow as pa
+import struct
+import time
+import unicodedata
+import uuid
+from appconfig import Settings
+from src.compression import PRECOMPRESSED_LEVELS, compress, compressible_codings, negotiate
+from src.filters import ILIKE, FilterEngine
+from src.versions import data_versions
+
+config = Settings()
+logger = logging.getLogger(__name__)
+# Computations of missed keys running in this worker, awaited by concurrent requests for the same key
+_in_flight: Dict[str, asyncio.Future] = {}
+# Requests served by another request's computation, in this worker or in another one
+coalescing_stats = {"local": 0, "remote": 0}
+# Cache lookups of each cached endpoint in this worker
+endpoint_stats: Dict[str, Dict[str, int]] = defaultdict(
+    lambda: {"hits": 0, "misses": 0, "bypass": 0, "stale": 0, "revalidations": 0, "not_modified": 0})
+# Values written to Redis by this worker, and their bytes before and after compression
+compression_stats = {"compressed": 0, "uncompressed": 0, "raw_bytes": 0, "stored_bytes": 0}
+# Background refreshes of stale keys running in this worker
+_revalidating: Dict[str, asyncio.Task] = {}
+# Request validators and caching headers of the response being served (see CacheControlMiddleware)
+_cache_control: ContextVar[Optional[dict]] = ContextVar("cache_control", default=None)
+
+
+class LocalCache(Memory):
+    """
+    In-process LRU holding at most `size` entries, each for at most `ttl` seconds
+    """
+
+    def __init__(self, size: int, ttl: float):
+        super().__init__(size=size)
+        self.ttl = ttl
+
+    def _local_expire(self, expire):
+        return min(expire, self.ttl) if expire else self.ttl
+
+    async def set(self, key, value, expire=None, exist=None):
+        return await super().set(key, value, self._local_expire(expire), exist)
+
+    async def set_many(self, pairs, expire=None):
+        return await super().set_many(pairs, self._local_expire(expire))
+
+
+class TieredCache(BcastClientSide):
+    """
+    Two-tier cache backend: a bounded in-process LRU (L1) in front of Redis (L2).
+
+    L1 stays coherent through Redis client tracking in broadcast mode: Redis publishes every
+    key written or deleted under the prefix, by any worker, on an invalidation channel the
+    backend listens to, dropping the key from its L1. Hits of each tier are counted per worker.
+    """
+
+    def __init__(self, *args, local_size: int = 1000, local_ttl: float = 60, **kwargs):
+        super().__init__(*args, local_cache=LocalCache(local_size, local_ttl), **kwargs)
+        self.stats = {"l1_hits": 0, "l2_hits": 0, "misses": 0}
+
+    async def get(self, key, default=None):
+        if self._listen_started.is_set():
+            value = await self._local_cache.get(key, default=_empty)
+            if value is _empty_in_redis:
+                self.stats["misses"] += 1
+                return default
+            if value is not _empty:
+                self.stats["l1_hits"] += 1
+                return value
+        value = await Redis.get(self, self._add_prefix(key), default=_empty)
+        if value is not _empty:
+            self.stats["l2_hits"] += 1
+            await self._local_cache.set(key, value)
+            return value
+        # Known misses are kept too, until the key is written and its invalidation arrives
+        self.stats["misses"] += 1
+        await self._local_cache.set(key, _empty_in_redis)
+        return default
+
+    # Locks live in Redis only: a local copy would outlive the unlock of another worker, whose
+    # invalidation is ignored right after the lock was attempted here
+
+    async def set_lock(self, key, value, expire):
+        return await Redis.set_lock(self, self._add_prefix(key), value, expire=expire)
+
+    async def unlock(self, key, value):
+        return await Redis.unlock(self, self._add_prefix(key), value)
+
+    async def is_locked(self, key, wait=None, step=0.1):
+        key = self._add_prefix(key)
+        if wait is None:
+            return bool(await self._client.exists(key))
+        while wait > 0.0:
+            if not await self._client.exists(key):
+                return False
+            wait -= step
+            await asyncio.sleep(step)
+        return True
+
+
+class CompressedPickler(Pickler):
+    """
+    Pickles the cached values, compressing those larger than `threshold` bytes with a pyarrow
+    codec. Compressed values start with the codec's marker and their uncompressed size; the
+    others are plain pickles, so values written before or without compression still load
+    """
+    _MARKERS = {"zstd": b"Z", "lz4": b"L"}
+    _HEADER = struct.Struct(">cI")
+
+    def __init__(self, codec: str, level: int, threshold: int):
+        self.marker = self._MARKERS[codec]
+        self.codec = pa.Codec(codec, level) if pa.Codec.supports_compression_level(codec) else pa.Codec(codec)
+        self.threshold = threshold
+        self._decoders = {marker: pa.Codec(name) for name, marker in self._MARKERS.items()}
+
+    def dumps(self, value) -> bytes:
+        data = Pickler.dumps(value)
+        compression_stats["raw_bytes"] += len(data)
+        if len(data) >= self.threshold:
+            compressed = self.codec.compress(data, asbytes=True)
+            if len(compressed) + self._HEADER.size < len(data):
+                compression_stats["compressed"] += 1
+                compression_stats["stored_bytes"] += len(compressed) + self._HEADER.size
+                return self._HEADER.pack(self.marker, len(data)) + compressed
+        compression_stats["uncompressed"] += 1
+        compression_stats["stored_bytes"] += len(data)
+        return data
+
+    def loads(self, value: bytes):
+        decoder = self._decoders.get(value[:1])
+        if decoder is not None:
+            _, size = self._HEADER.unpack_from(value)
+            value = decoder.decompress(value[self._HEADER.size:], size, asbytes=True)
+        return Pickler.loads(value)
+
+
+def _redis_backend(**params):
+    backend = TieredCache(**params) if params.pop("client_side", None) else Redis(**params)
+    if config.CACHE_COMPRESSION:
+        backend._serializer.set_pickler(CompressedPickler(config.CACHE_COMPRESSION, config.CACHE_COMPRESSION_LEVEL,
+                                                          config.CACHE_COMPRESSION_THRESHOLD))
+    return backend
+
+
+register_backend("redis", _redis_backend, pass_uri=True)
+register_backend("rediss", _redis_backend, pass_uri=True)
+
 
 def setup_cache(settings):
-    cache.setup(settings.CACHE_SERVER_URL, 
+    tiered = settings.CACHE_SERVER_URL.startswith("redis") and settings.CACHE_L1_SIZE > 0
+    local = {"client_side": True, "local_size": settings.CACHE_L1_SIZE, "local_ttl": settings.CACHE_L1_TTL} if tiered else {}
+    cache.setup(settings.CACHE_SERVER_URL,
                 enable=True,
-                suppress=False)
+                suppress=False,
+                **local)
+
+
+def _fold_text(value: str, accent_insensitive: bool) -> str:
+    # Surrounding spaces are kept: they are part of the ILIKE pattern
+    value = value.lower()
+    if accent_insensitive:
+        value = "".join(char for char in unicodedata.normalize("NFKD", value) if not unicodedata.combining(char))
+    return value
+
+
+def _canonical(value):
+    if dataclasses.is_dataclass(value):
+        return {name: _canonical(item) for name, item in dataclasses.asdict(value).items()}
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    return value
+
+
+def _canonical_filters(filtros, filter_engine: Optional[FilterEngine]) -> dict:
+    """
+    Informed filters only; lists of values are sets, and substring filters are matched regardless
+    of case (and accents, in accent-insensitive mode)
+    """
+    filters = {}
+    for name, value in dataclasses.asdict(filtros).items():
+        if isinstance(value, (list, tuple)):
+            value = sorted({_canonical(item) for item in value if item is not None and item != ""}, key=repr)
+            if len(value) == 1:
+                value = value[0]
+        if value is None or value == "" or value == []:
+            continue
+        if filter_engine is not None and filter_engine.operators.get(name) == ILIKE and isinstance(value, str):
+            value = _fold_text(value, filter_engine.accent_insensitive)
+        filters[name] = _canonical(value)
+    return filters
+
+
+def _canonical_pagination(paginacao, filter_engine: Optional[FilterEngine]) -> dict:
+    # 'pagina' stays even with a cursor, which ignores it: the response still echoes it as page_number
+    pagination = _canonical(paginacao)
+    fields = {name.strip() for value in pagination.pop("campos", None) or [] for name in value.split(",") if name.strip()}
+    if fields and filter_engine is not None:
+        # The primary key is always selected, and asking for every column is the same as asking for none
+        fields |= {column.name for column in filter_engine.table.primary_key.columns}
+        if fields >= set(filter_engine.operators):
+            fields = set()
+    if fields:
+        pagination["campos"] = sorted(fields)
+    return pagination
+
+
+def request_fingerprint(kwargs: dict, filter_engine: Optional[FilterEngine] = None) -> str:
+    """
+    Canonical fingerprint of an endpoint call: a digest of its normalized filters, pagination
+    and remaining parameters, leaving the injected session out. Equivalent requests share it
+    """
+    canonical = {}
+    for name, value in kwargs.items():
+        if isinstance(value, AsyncSession):
+            continue
+        if name == "filtros":
+            canonical[name] = _canonical_filters(value, filter_engine)
+        elif name in ("paginacao", "exportacao"):
+            canonical[name] = _canonical_pagination(value, filter_engine)
+        else:
+            canonical[name] = _canonical(value)
+    return hashlib.sha1(orjson.dumps(canonical, option=orjson.OPT_SORT_KEYS, default=str)).hexdigest()
+
+
+async def single_flight(key: str, compute: Callable[[], Awaitable]):
+    """
+    Runs the computation of a key once per worker: concurrent calls for the same key await the
+    result of the call already running
+    """
+    future = _in_flight.get(key)
+    if future is not None:
+        coalescing_stats["local"] += 1
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # Raised either by this request's own cancellation or by the first caller's, in
+            # which case the computation is retried
+            if not future.cancelled():
+                raise
+            return await single_flight(key, compute)
+
+    future = _in_flight[key] = asyncio.get_running_loop().create_future()
+    # Nobody may be waiting for the outcome, which must not be reported as never retrieved
+    future.add_done_callback(lambda done: done.cancelled() or done.exception())
+    try:
+        result = await compute()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        del _in_flight[key]
+
+
+class CacheEntry(NamedTuple):
+    """
+    Cached response, encoded as it is sent, fresh until `fresh_until` (a timestamp) and then served
+    stale while it is refreshed in background, until Redis drops it at its hard expiry.
+
+    Only the uncompressed body is stored in Redis. Each worker compresses it on the first request
+    for a content coding and keeps the result on the entry, for as long as its L1 holds the entry
+    """
+    body: bytes
+    media_type: str
+    etag: str
+    # Compressed bodies, by content coding, filled on demand
+    variants: Dict[str, bytes]
+    fresh_until: float
+
+    def __reduce__(self):
+        return CacheEntry, (self.body, self.media_type, self.etag, {}, self.fresh_until)
+
+    def codings(self) -> Tuple[str, ...]:
+        return compressible_codings(self.body)
+
+    def encoded(self, coding: Optional[str]) -> bytes:
+        if coding is None:
+            return self.body
+        variant = self.variants.get(coding)
+        if variant is None:
+            variant = self.variants[coding] = compress(self.body, coding)
+        return variant
+
+    def variant_etag(self, coding: Optional[str]) -> str:
+        # Each representation gets its own strong ETag
+        return f'{self.etag[:-1]}-{coding}"' if coding else self.etag
+
+    def response(self, coding: Optional[str] = None) -> Response:
+        headers = {"ETag": self.variant_etag(coding), "Vary": "Accept-Encoding"}
+        if coding:
+            headers["Content-Encoding"] = coding
+        return Response(self.encoded(coding), media_type=self.media_type, headers=headers)
+
+
+def _etag(data: bytes) -> str:
+    return f'"{hashlib.sha1(data).hexdigest()}"'
+
+
+async def _store(key: str, rendered: Tuple[bytes, str], ttl: float, stale_ttl: float,
+                 etag: Optional[str] = None) -> CacheEntry:
+    """
+    Caches a rendered response under `etag` or, when none is given, an ETag derived from its body
+    """
+    body, media_type = rendered
+    entry = CacheEntry(body, media_type, etag or _etag(body), {}, time.time() + ttl)
+    await cache.set(key, entry, expire=ttl + stale_ttl)
+    return entry
+
+
+async def _render(route: APIRoute, value) -> Tuple[bytes, str]:
+    """
+    Validates and encodes an endpoint result as FastAPI does for its route, so hits skip both
+    """
+    content = await serialize_response(field=route.response_field, response_content=value,
+                                       include=route.response_model_include, exclude=route.response_model_exclude,
+                                       by_alias=route.response_model_by_alias,
+                                       exclude_unset=route.response_model_exclude_unset,
+                                       exclude_defaults=route.response_model_exclude_defaults,
+                                       exclude_none=route.response_model_exclude_none)
+    response_class = route.response_class
+    if isinstance(response_class, DefaultPlaceholder):
+        response_class = response_class.value
+    response = response_class(content)
+    return response.body, response.media_type
+
+
+def bind_cached_routes(app):
+    """
+    Hands each cached endpoint its route, whose response model and class encode the cached responses
+    """
+    for route in app.routes:
+        if isinstance(route, APIRoute) and hasattr(route.endpoint, "cache_key_prefix"):
+            route.endpoint.route = route
+
+
+async def _fill(key: str, ttl: float, stale_ttl: float, compute: Callable[[], Awaitable],
+                etag: Optional[str] = None) -> CacheEntry:
+    """
+    Computes and caches a missed key, unless another worker holds its lock: then its result is
+    awaited, as long as the lock is held (at most CACHE_LOCK_TTL seconds)
+    """
+    lock_key, token = f"lock:{key}", uuid.uuid4().hex
+    if not await cache.set_lock(lock_key, token, expire=config.CACHE_LOCK_TTL):
+        deadline = asyncio.get_running_loop().time() + config.CACHE_LOCK_TTL
+        while asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(config.CACHE_LOCK_POLL_INTERVAL)
+            entry = await cache.get(key, default=_empty)
+            if isinstance(entry, CacheEntry):
+                coalescing_stats["remote"] += 1
+                return entry
+            if not await cache.is_locked(lock_key):
+                # The other worker failed or gave up; compute it here
+                break
+        return await _store(key, await compute(), ttl, stale_ttl, etag)
+    try:
+        return await _store(key, await compute(), ttl, stale_ttl, etag)
+    finally:
+        await cache.unlock(lock_key, token)
+
+
+async def _revalidate(key: str, ttl: float, stale_ttl: float, render: Callable[..., Awaitable], kwargs: dict,
+                      etag: Optional[str] = None):
+    """
+    Refreshes a stale key, unless another worker is already doing it. The request's session is
+    closed by then, so the endpoint runs on a session of its own
+    """
+    lock_key, token = f"lock:{key}", uuid.uuid4().hex
+    if not await cache.set_lock(lock_key, token, expire=config.CACHE_LOCK_TTL):
+        return
+    try:
+        async with AsyncExitStack() as stack:
+            kwargs = {name: await stack.enter_async_context(AsyncSession(bind=value.bind, expire_on_commit=False))
+                      if isinstance(value, AsyncSession) else value
+                      for name, value in kwargs.items()}
+            await _store(key, await render(**kwargs), ttl, stale_ttl, etag)
+    except Exception as e:
+        logger.error(f"Erro ao revalidar {key}: {str(e)}")
+    finally:
+        await cache.unlock(lock_key, token)
+
+
+def _revalidate_in_background(key: str, ttl: float, stale_ttl: float, render: Callable[..., Awaitable], kwargs: dict,
+                              etag: Optional[str] = None) -> bool:
+    if key in _revalidating:
+        return False
+    task = _revalidating[key] = asyncio.create_task(_revalidate(key, ttl, stale_ttl, render, kwargs, etag))
+    task.add_done_callback(lambda _: _revalidating.pop(key, None))
+    return True
+
+
+def _not_modified(directives: dict, etag: str, last_modified: Optional[datetime], match_any: bool = True) -> Optional[str]:
+    """
+    Whether the client already holds the current response, by its ETag (in any content coding) or,
+    failing that, its date. Returns the validator to answer Not Modified with. Without `match_any`,
+    only an ETag of the response itself counts, not "*"
+    """
+    if_none_match = directives.get("if_none_match")
+    if if_none_match:
+        current = {etag, *(f'{etag[:-1]}-{coding}"' for coding in PRECOMPRESSED_LEVELS)}
+        for held in if_none_match.split(","):
+            held = held.strip().removeprefix("W/")
+            if held in current:
+                return held
+            if held == "*" and match_any:
+                return etag
+        return None
+    if_modified_since = directives.get("if_modified_since")
+    if if_modified_since and last_modified is not None:
+        try:
+            if last_modified.replace(microsecond=0) <= parsedate_to_datetime(if_modified_since):
+                return etag
+        except (TypeError, ValueError):
+            pass
+    return None
+
+
+def _set_caching_headers(directives: dict, max_age: float, stale: float, tables: Sequence[str],
+                         last_modified: Optional[datetime]):
+    headers = directives["headers"]
+    headers["Cache-Control"] = f"public, max-age={max(int(max_age), 0)}, stale-while-revalidate={max(int(stale), 0)}"
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+    if config.SURROGATE_KEY_HEADER and tables:
+        headers[config.SURROGATE_KEY_HEADER] = " ".join(tables)
+
+
+def _not_modified_response(validator: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": validator, "Vary": "Accept-Encoding"})
+
+
+def _check_etag(etag: Optional[str], tables: Sequence[str], last_modified: Optional[datetime], ttl: float,
+                stale_ttl: float) -> Optional[Response]:
+    """
+    Answers Not Modified before reading the cache or the database when the client holds the ETag of
+    the key, which only changes with the data versions. Weaker validators ("*", If-Modified-Since)
+    wait for the cached entry: they would also match requests failing validation
+    """
+    directives = _cache_control.get()
+    if directives is None or etag is None:
+        return None
+    validator = _not_modified(directives, etag, None, match_any=False)
+    if validator is None:
+        return None
+    _set_caching_headers(directives, ttl, stale_ttl, tables, last_modified)
+    return _not_modified_response(validator)
+
+
+def _serve(entry: CacheEntry, max_age: float, stale: float, tables: Sequence[str],
+           last_modified: Optional[datetime]) -> Response:
+    """
+    Response of a cached entry, in the content coding the client prefers, or Not Modified when the
+    client already holds it
+    """
+    directives = _cache_control.get()
+    if directives is None:
+        return entry.response()
+    _set_caching_headers(directives, max_age, stale, tables, last_modified)
+    validator = _not_modified(directives, entry.etag, last_modified)
+    if validator is not None:
+        return _not_modified_response(validator)
+    return entry.response(negotiate(directives.get("accept_encoding"), entry.codings()))
+
+
+class CacheControlMiddleware:
+    """
+    Sets the caching headers of the GET responses of the cached endpoints: Cache-Control (how long
+    they stay fresh and, past that, for how long they may be served stale while being revalidated),
+    Last-Modified and the surrogate keys a CDN purges them by. Hands the endpoints the validators the
+    client holds (If-None-Match, If-Modified-Since), answered with Not Modified, and the content
+    codings it accepts (Accept-Encoding), served from the compressed variants of the cached entries
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            return await self.app(scope, receive, send)
+        headers = Headers(scope=scope)
+        directives = {"if_none_match": headers.get("if-none-match"), "if_modified_since": headers.get("if-modified-since"),
+                      "accept_encoding": headers.get("accept-encoding"), "headers": {}}
+        token = _cache_control.set(directives)
+
+        async def send_with_cache_control(message: Message):
+            # Errors are neither cacheable nor tagged
+            if (message["type"] == "http.response.start" and directives["headers"]
+                    and (200 <= message["status"] < 300 or message["status"] == status.HTTP_304_NOT_MODIFIED)):
+                MutableHeaders(scope=message).update(directives["headers"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cache_control)
+        finally:
+            _cache_control.reset(token)
+
+
+def cached(ttl, prefix: Optional[str] = None, filters: Optional[FilterEngine] = None, tables: Sequence[str] = (),
+           stale_ttl=None):
+    """
+    Caches the responses of an endpoint under the canonical fingerprint of the request, normalizing
+    the filters with the endpoint's filter engine, and the data versions of the tables it reads (the
+    filter engine's table by default), so a data load invalidates them. Each missed key is computed
+    once across all workers: requests in the same worker share the running computation and the other
+    workers wait, behind a short Redis lock, for its result instead of querying the database again.
+
+    Responses are fresh for `ttl`; for `stale_ttl` more (CACHE_STALE_TTL by default) they are still
+    served at once, while a single background task refreshes them. They are cached as the encoded
+    body of the response, with its ETag, and served as they are (see bind_cached_routes)
+    """
+    ttl = ttl_to_seconds(ttl)
+    stale_ttl = ttl_to_seconds(config.CACHE_STALE_TTL if stale_ttl is None else stale_ttl)
+
+    def decorator(func):
+        key_prefix = f"{prefix or func.__module__}:{func.__name__}"
+        stats = endpoint_stats[func.__name__]
+        read_tables = tuple(tables) or ((filters.table.name,) if filters is not None else ())
+
+        async def render(**kwargs) -> Tuple[bytes, str]:
+            return await _render(wrapper.route, await func(**kwargs))
+
+        @wraps(func)
+        async def wrapper(**kwargs):
+            if cache.is_disable(Command.GET):
+                # Cache-Control: no-cache (see CacheRequestControlMiddleware)
+                stats["bypass"] += 1
+                return await func(**kwargs)
+            key = f"{key_prefix}:{request_fingerprint(kwargs, filters)}:v{data_versions.tag(read_tables)}"
+            # Without a version row for every table read, the key may outlive changes of the data:
+            # validators then derive from the body
+            etag, last_modified = None, None
+            if data_versions.tracks(read_tables):
+                etag, last_modified = _etag(key.encode()), data_versions.last_modified(read_tables)
+            response = _check_etag(etag, read_tables, last_modified, ttl, stale_ttl)
+            if response is None:
+                entry = await cache.get(key, default=_empty)
+                if isinstance(entry, CacheEntry):
+                    stats["hits"] += 1
+                    fresh_for = entry.fresh_until - time.time()
+                    if fresh_for <= 0:
+                        stats["stale"] += 1
+                        if _revalidate_in_background(key, ttl, stale_ttl, render, kwargs, etag):
+                            stats["revalidations"] += 1
+                    response = _serve(entry, fresh_for, stale_ttl + min(fresh_for, 0), read_tables, last_modified)
+                else:
+                    stats["misses"] += 1
+                    entry = await single_flight(key, lambda: _fill(key, ttl, stale_ttl, lambda: render(**kwargs), etag))
+                    response = _serve(entry, entry.fresh_until - time.time(), stale_ttl, read_tables, last_modified)
+            if response.status_code == status.HTTP_304_NOT_MODIFIED:
+                stats["not_modified"] += 1
+            return response
+
+        # Identifies the cached endpoints, e.g. for the cache warm-up
+        wrapper.cache_key_prefix = key_prefix
+        return wrapper
+
+    return decorator
+
+
+def cache_stats() -> dict:
+    """
+    Hit ratios of the cache tiers and of each endpoint, coalesced requests and compression of the
+    values written, in this worker
+    """
+    endpoints = {name: {**stats, "hit_ratio": round(stats["hits"] / (stats["hits"] + stats["misses"]), 4)
+                        if stats["hits"] + stats["misses"] else None}
+                 for name, stats in endpoint_stats.items()}
+    compression = {"codec": config.CACHE_COMPRESSION or None, **compression_stats,
+                   "ratio": round(compression_stats["raw_bytes"] / compression_stats["stored_bytes"], 2)
+                   if compression_stats["stored_bytes"] else None}
+    backend = cache._get_backend("")
+    if not isinstance(backend, TieredCache):
+        return {"tiered": False, "coalesced": coalescing_stats, "compression": compression, "endpoints": endpoints}
+    l1_hits, l2_hits, misses = backend.stats["l1_hits"], backend.stats["l2_hits"], backend.stats["misses"]
+    lookups = l1_hits + l2_hits + misses
+    return {
+        "tiered": True,
+        "worker": os.getpid(),
+        **backend.stats,
+        "l1_entries": len(backend._local_cache.store),
+        # L1 over every lookup; L2 over the lookups L1 missed
+        "l1_hit_ratio": round(l1_hits / lookups, 4) if lookups else None,
+        "l2_hit_ratio": round(l2_hits / (l2_hits + misses), 4) if l2_hits + misses else None,
+        "hit_ratio": round((l1_hits + l2_hits) / lookups, 4) if lookups else None,
+        "coalesced": coalescing_stats,
+        "compression": compression,
+        "endpoints": endpoints,
+    }
@@ -0,0 +1,97 @@
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, Numeric, String, Table
+from typing import AsyncIterator, Dict, List, Optional
+import io
+import pyarrow as pa
+import pyarrow.parquet as pq
+from appconfig import Settings
+from src.filters import storage_type
+from src.schemas import FormatoExportacao
+
+config = Settings()
+
+# Export formats written column by column with pyarrow
+COLUMNAR_FORMATS = (FormatoExportacao.parquet, FormatoExportacao.arrow)
+
+# Arrow type of each SQL column type used by the models, checked in order
+_ARROW_TYPES = (
+    (Boolean, pa.bool_()),
+    (Integer, pa.int64()),
+    ((Float, Numeric), pa.float64()),
+    (DateTime, pa.timestamp("us")),
+    (Date, pa.date32()),
+    (String, pa.string()),
+)
+
+_schemas: Dict[str, pa.Schema] = {}
+
+
+def arrow_schema(table: Table) -> pa.Schema:
+    """
+    Derives the Arrow schema of a model's table from its column types
+    """
+    schema = _schemas.get(table.fullname)
+    if schema is None:
+        fields = []
+        for column in table.columns:
+            column_type = storage_type(column)
+            arrow_type = next((arrow_type for sql_types, arrow_type in _ARROW_TYPES
+                               if isinstance(column_type, sql_types)), pa.string())
+            # The tables are loaded by an external process, so nulls are allowed regardless of the model
+            fields.append(pa.field(column.name, arrow_type))
+        schema = _schemas[table.fullname] = pa.schema(fields)
+    return schema
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only file handed to the pyarrow writers. It keeps the bytes written since the last
+    drain, while reporting the absolute position the writers use for their file offsets
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def encode_columnar(table: Table, batches: AsyncIterator[list], export_format: FormatoExportacao,
+                          columns: Optional[List[str]] = None):
+    """
+    Encodes batches of row tuples of a table into a Parquet file (one row group per batch) or an
+    Arrow IPC stream, yielding the bytes produced by each batch as soon as it is written. The rows
+    hold the given columns of the table, or all of them
+    """
+    schema = arrow_schema(table)
+    if columns is not None and len(columns) < len(schema):
+        schema = pa.schema([schema.field(name) for name in columns])
+    sink = _ChunkSink()
+    if export_format == FormatoExportacao.parquet:
+        writer = pq.ParquetWriter(sink, schema, compression=config.PARQUET_COMPRESSION)
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    try:
+        async for rows in batches:
+            columns = zip(*rows)
+            writer.write_batch(pa.record_batch([pa.array(values, type=field.type)
+                                                for values, field in zip(columns, schema)], schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    # Footer of the Parquet file or end-of-stream marker of the Arrow stream
+    yield sink.drain()
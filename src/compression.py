@@ -0,0 +1,54 @@
+from typing import Iterable, Optional, Tuple
+import gzip
+import pyarrow as pa
+from appconfig import Settings
+
+config = Settings()
+
+# Content codings produced for the cached responses, preferred in this order on equal quality.
+# Compressed once per cached response and worker, not per request, so they afford higher levels than on the fly
+PRECOMPRESSED_LEVELS = {"br": 9, "gzip": 9}
+_brotli = pa.Codec("brotli", PRECOMPRESSED_LEVELS["br"])
+
+
+def compressible_codings(body: bytes) -> Tuple[str, ...]:
+    """
+    Content codings a response body may be compressed in: none for bodies smaller than
+    RESPONSE_COMPRESSION_MIN_SIZE bytes, or when compression is disabled
+    """
+    if not config.RESPONSE_COMPRESSION or len(body) < config.RESPONSE_COMPRESSION_MIN_SIZE:
+        return ()
+    return tuple(PRECOMPRESSED_LEVELS)
+
+
+def compress(body: bytes, coding: str) -> bytes:
+    if coding == "br":
+        return _brotli.compress(body, asbytes=True)
+    return gzip.compress(body, compresslevel=PRECOMPRESSED_LEVELS["gzip"], mtime=0)
+
+
+def negotiate(accept_encoding: Optional[str], available: Iterable[str]) -> Optional[str]:
+    """
+    Content coding to send among the available ones, following the qualities of Accept-Encoding.
+    None stands for the identity coding
+    """
+    if not accept_encoding:
+        return None
+    qualities = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding.strip().lower()] = quality
+    # Identity is acceptable unless refused explicitly, but any accepted coding is preferred
+    best, best_quality = None, qualities.get("identity", 0.001)
+    for coding in available:
+        quality = qualities.get(coding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
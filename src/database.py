@@ -1,20 +1,58 @@
 import asyncio
 from typing import AsyncGenerator
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.util import LRUCache
 from sqlmodel import SQLModel, Session
 from sqlmodel.ext.asyncio.session import AsyncSession
 from appconfig import Settings
 import logging
+import weakref
 from tenacity import retry, stop_after_attempt, wait_fixed
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class StatementCache(LRUCache):
+    """
+    Prepared statement cache of an asyncpg connection that counts its hits and misses.
+
+    The asyncpg dialect prepares every statement on the server and keeps it per connection,
+    keyed by the SQL text, so a statement shape executed again on the same connection skips
+    parsing and planning. This cache replaces the dialect's own one to report that reuse.
+    """
+
+    __slots__ = ("stats", "__weakref__")
+
+    def __init__(self, capacity: int, stats: dict):
+        super().__init__(capacity)
+        self.stats = stats
+
+    def __contains__(self, key):
+        # Membership checks must not go through __getitem__, or they would count as hits
+        return key in self._data
+
+    def __getitem__(self, key):
+        # Only reached after a successful lookup by the dialect
+        self.stats["hits"] += 1
+        return super().__getitem__(key)
+
+    def __setitem__(self, key, value):
+        # A new statement was prepared on the server. A stale one being replaced was already
+        # counted as a hit by the lookup that found it
+        if key in self._data:
+            self.stats["hits"] -= 1
+        self.stats["misses"] += 1
+        super().__setitem__(key, value)
+
+
 # Initialize engine and sessionmaker once (no globals)
 class Database:
     def __init__(self):
         self.engine = None
         self.async_session_maker = None
+        self.statement_stats = {"hits": 0, "misses": 0}
+        self._statement_caches = weakref.WeakValueDictionary()
 
     @retry(stop=stop_after_attempt(5), wait=wait_fixed(3))
     async def init_db(self):
@@ -25,8 +63,11 @@ class Database:
             pool_pre_ping=True,
             pool_size=10,
             max_overflow=20,
-            pool_recycle=3600  # recycle the connections after 1 hour (3600 seconds)
+            pool_recycle=3600,  # recycle the connections after 1 hour (3600 seconds)
+            connect_args={"prepared_statement_cache_size": settings.PREPARED_STATEMENT_CACHE_SIZE}
         )
+        if settings.PREPARED_STATEMENT_CACHE_SIZE:
+            event.listen(self.engine.sync_engine, "connect", self._track_statement_cache)
         
         # Test connection
         async with self.engine.begin() as conn:
@@ -41,6 +82,53 @@ class Database:
             expire_on_commit=False
         )
 
+    def _track_statement_cache(self, dbapi_connection, connection_record):
+        # Swap the connection's prepared statement cache for a counting one of the same size
+        cache = getattr(dbapi_connection, "_prepared_statement_cache", None)
+        if cache is None:
+            return
+        tracked = StatementCache(cache.capacity, self.statement_stats)
+        dbapi_connection._prepared_statement_cache = tracked
+        self._statement_caches[id(tracked)] = tracked
+
+    def statement_cache_stats(self) -> dict:
+        """
+        Hit and miss counts of the prepared statement caches of the engine's connections
+        """
+        hits, misses = self.statement_stats["hits"], self.statement_stats["misses"]
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None,
+            "connections": len(self._statement_caches),
+            "cached_statements": sum(len(cache) for cache in self._statement_caches.values()),
+        }
+
+    async def ensure_indexes(self):
+        """
+        Builds the indexes backing the query filters. Failures are logged without stopping the
+        application, which keeps serving (more slowly) without them
+        """
+        from src.indexes import ensure_indexes
+        try:
+            await ensure_indexes(self.engine)
+            logger.info("Índices verificados.")
+        except Exception as e:
+            logger.error(f"Erro ao criar os índices: {str(e)}")
+
+    async def track_data_versions(self):
+        """
+        Sets up the data version table and keeps the versions of this worker current. Failures of
+        the setup are logged; the versions then stay at zero until a bump
+        """
+        from src.versions import data_versions
+        try:
+            await data_versions.setup(self.engine)
+            logger.info("Versões dos dados carregadas.")
+        except Exception as e:
+            logger.error(f"Erro ao preparar as versões dos dados: {str(e)}")
+        await data_versions.listen(self.engine)
+
     async def get_db_session(self) -> AsyncGenerator[AsyncSession, None]:
         async with self.async_session_maker() as session:
             yield session
@@ -0,0 +1,138 @@
+from sqlalchemy import Column, Date, DateTime, String, TypeDecorator, any_, bindparam, cast, func
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlmodel import select
+from datetime import date
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+from appconfig import Settings
+from src.models import db_schema
+
+config = Settings()
+
+# Operators applied by the filter engine
+EQ = "eq"            # exact match on text columns holding codes and identifiers
+ILIKE = "ilike"      # case-insensitive substring match on free text columns
+DATE = "date"        # date equality; timestamp columns are compared by their date part
+NUMERIC = "numeric"  # equality on numeric and boolean columns
+
+# Upper bound of statements kept per model, one per distinct set of active filters
+MAX_CACHED_STATEMENTS = 1024
+# Immutable wrapper over unaccent(), created with the indexes (see src/indexes.py)
+UNACCENT_FUNCTION = "immutable_unaccent"
+
+
+def unaccent(expression):
+    return getattr(getattr(func, db_schema), UNACCENT_FUNCTION)(expression)
+
+
+def storage_type(column: Column):
+    """
+    Returns the SQL type a column is stored as, unwrapping type decorators such as
+    SQLModel's AutoString (declared over String for the text columns)
+    """
+    return column.type.impl_instance if isinstance(column.type, TypeDecorator) else column.type
+
+
+def column_operator(column: Column) -> str:
+    """
+    Derives the filter operator of a column from its type, unless the model sets one
+    explicitly in the column info
+    """
+    if "filter" in column.info:
+        return column.info["filter"]
+    column_type = storage_type(column)
+    if isinstance(column_type, (Date, DateTime)):
+        return DATE
+    if isinstance(column_type, String):
+        return ILIKE
+    return NUMERIC
+
+
+class FilterEngine:
+    """
+    Builds the filtered select of a table model from its active query parameters.
+
+    The filterable fields and their operators come from the model's columns. Only the active
+    filters become predicates, written against bound parameters, so the statement built for
+    each set of active filters is kept and reused by every request with the same shape.
+
+    Equality filters also accept a list of values, matched with a single `= ANY(array)`
+    predicate bound to one array parameter, whatever the length of the list.
+
+    The select can also be narrowed to a subset of the columns (sparse fieldsets). The primary
+    key is always kept, as the keyset cursors and exports are ordered by it.
+    """
+
+    def __init__(self, model, accent_insensitive: bool = config.UNACCENT_SEARCH):
+        self.model = model
+        self.accent_insensitive = accent_insensitive
+        self.table = model.__table__
+        self.operators: Dict[str, str] = {column.name: column_operator(column) for column in self.table.columns}
+        self._statements: Dict[Tuple[FrozenSet[Tuple[str, bool]], Tuple[str, ...]], select] = {}
+
+    def active(self, params: dict) -> dict:
+        """
+        Picks the informed filters of the model out of the request parameters. Lists of a single
+        value are taken as that value
+        """
+        filters = {}
+        for name, value in params.items():
+            if name not in self.operators:
+                continue
+            if isinstance(value, (list, tuple)):
+                value = [item for item in value if item is not None and item != ""]
+                if len(value) == 1:
+                    value = value[0]
+                elif not value:
+                    continue
+            if value is not None and value != "":
+                filters[name] = value
+        return filters
+
+    def _predicate(self, name: str, multiple: bool = False):
+        column = self.table.columns[name]
+        operator = self.operators[name]
+        if multiple:
+            if operator not in (EQ, NUMERIC):
+                raise ValueError(f"O filtro {name} não aceita múltiplos valores")
+            return column == any_(bindparam(name, type_=ARRAY(storage_type(column))))
+        if operator == ILIKE:
+            if self.accent_insensitive:
+                return unaccent(column).ilike(unaccent(bindparam(name)))
+            return column.ilike(bindparam(name))
+        if operator == DATE:
+            if isinstance(column.type, DateTime):
+                return cast(column, Date) == bindparam(name, type_=Date)
+            return column == bindparam(name, type_=Date)
+        return column == bindparam(name, type_=column.type)
+
+    def _value(self, name: str, value):
+        operator = self.operators[name]
+        if isinstance(value, list):
+            return [self._value(name, item) for item in value]
+        if operator == EQ:
+            # Codes are text columns, even when informed as numbers
+            return str(value)
+        if operator == ILIKE:
+            return f"%{value}%"
+        if operator == DATE and isinstance(value, str):
+            return date.fromisoformat(value)
+        return value
+
+    def invalid_fields(self, fields: Iterable[str]) -> List[str]:
+        return [name for name in fields if name not in self.operators]
+
+    def build(self, filters: dict, fields: Tuple[str, ...] = ()) -> Tuple[select, dict]:
+        """
+        Returns the select for the active filters and the values of its bound parameters. When
+        fields are informed, only those columns (and the primary key) are selected
+        """
+        shape = frozenset((name, isinstance(value, list)) for name, value in filters.items())
+        fields = tuple(sorted(set(fields)))
+        query = self._statements.get((shape, fields))
+        if query is None:
+            columns = [column for column in self.table.columns
+                       if not fields or column.name in fields or column.primary_key]
+            query = select(*columns).where(*[self._predicate(name, multiple) for name, multiple in sorted(shape)])
+            if len(self._statements) < MAX_CACHED_STATEMENTS:
+                self._statements[(shape, fields)] = query
+        return query, {name: self._value(name, value) for name, value in filters.items()}
@@ -0,0 +1,157 @@
+from sqlalchemy import Column, Table, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlmodel import SQLModel
+from dataclasses import dataclass
+from typing import Dict, List
+import hashlib
+import logging
+from appconfig import Settings
+from src import models
+from src.filters import ILIKE, UNACCENT_FUNCTION, column_operator
+
+config = Settings()
+logger = logging.getLogger(__name__)
+
+# Advisory lock serializing the index builds of concurrent workers
+INDEX_LOCK_KEY = 872_341_009
+# PostgreSQL truncates identifiers longer than this
+MAX_IDENTIFIER_LENGTH = 63
+
+_TRIGRAM_SETUP = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+)
+_UNACCENT_SETUP = (
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent() is only STABLE, so index expressions go through an IMMUTABLE wrapper
+    f"""CREATE OR REPLACE FUNCTION {models.db_schema}.{UNACCENT_FUNCTION}(text) RETURNS text
+        AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT""",
+)
+
+
+@dataclass(frozen=True)
+class IndexDefinition:
+    """
+    Index expected by the query endpoints on a table of the API schema
+    """
+    name: str
+    table: str
+    expression: str
+    method: str = "btree"
+
+    def create_statement(self) -> str:
+        # Built concurrently, so reads and the loading process are not blocked on large tables
+        return (f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {self.name} "
+                f"ON {models.db_schema}.{self.table} USING {self.method} ({self.expression})")
+
+
+def index_name(table: Table, column: Column, suffix: str) -> str:
+    name = f"ix_{table.name}_{column.name}_{suffix}"
+    if len(name) > MAX_IDENTIFIER_LENGTH:
+        digest = hashlib.sha1(name.encode()).hexdigest()[:8]
+        name = f"{name[:MAX_IDENTIFIER_LENGTH - 9]}_{digest}"
+    return name
+
+
+def model_tables() -> List[Table]:
+    return [table for table in SQLModel.metadata.sorted_tables if table.schema == models.db_schema]
+
+
+def trigram_indexes() -> List[IndexDefinition]:
+    """
+    GIN trigram indexes backing the substring (ilike) filters, derived from the filter engine. In accent-insensitive mode they
+    index the unaccented text, matching the expression used by the filter engine
+    """
+    indexes = []
+    for table in model_tables():
+        for column in table.columns:
+            if column_operator(column) != ILIKE:
+                continue
+            if config.UNACCENT_SEARCH:
+                indexes.append(IndexDefinition(index_name(table, column, "unaccent_trgm"), table.name,
+                                               f"{models.db_schema}.{UNACCENT_FUNCTION}({column.name}) gin_trgm_ops", "gin"))
+            else:
+                indexes.append(IndexDefinition(index_name(table, column, "trgm"), table.name,
+                                               f"{column.name} gin_trgm_ops", "gin"))
+    return indexes
+
+
+def declared_indexes() -> List[IndexDefinition]:
+    """
+    B-tree indexes declared in the models (index=True), named as create_all names them
+    """
+    preparer = postgresql.dialect().identifier_preparer
+    return [IndexDefinition(preparer.format_index(index), table.name, ", ".join(column.name for column in index.columns))
+            for table in model_tables()
+            for index in sorted(table.indexes, key=lambda index: index.name)]
+
+
+def expected_indexes() -> List[IndexDefinition]:
+    return declared_indexes() + trigram_indexes()
+
+
+async def _existing_indexes(conn: AsyncConnection) -> Dict[str, dict]:
+    result = await conn.execute(
+        text("SELECT c.relname AS name, t.relname AS table_name, i.indisvalid AS valid, i.indisprimary AS primary_key, "
+             "pg_get_indexdef(i.indexrelid) AS definition, "
+             "coalesce(s.idx_scan, 0) AS scans, pg_relation_size(i.indexrelid) AS size_bytes "
+             "FROM pg_index i "
+             "JOIN pg_class c ON c.oid = i.indexrelid "
+             "JOIN pg_class t ON t.oid = i.indrelid "
+             "JOIN pg_namespace n ON n.oid = c.relnamespace "
+             "LEFT JOIN pg_stat_user_indexes s ON s.indexrelid = i.indexrelid "
+             "WHERE n.nspname = :schema"),
+        {"schema": models.db_schema})
+    return {row["name"]: dict(row) for row in result.mappings()}
+
+
+async def index_report(engine: AsyncEngine) -> dict:
+    """
+    Compares the indexes expected by the query endpoints with the ones in the database
+    """
+    async with engine.connect() as conn:
+        existing = await _existing_indexes(conn)
+    expected = expected_indexes()
+    expected_names = {index.name for index in expected}
+    return {
+        "expected": [{"name": index.name, "table": index.table, "method": index.method,
+                      "expression": index.expression, "status": _index_status(existing.get(index.name))}
+                     for index in expected],
+        "missing": [index.name for index in expected if index.name not in existing],
+        "invalid": [name for name, index in existing.items() if not index["valid"]],
+        # Indexes neither expected nor backing a primary key, e.g. left behind by a previous search mode
+        "unexpected": [index for name, index in existing.items()
+                       if name not in expected_names and not index["primary_key"]],
+    }
+
+
+def _index_status(index: dict) -> dict:
+    if index is None:
+        return {"exists": False}
+    return {"exists": True, "valid": index["valid"], "scans": index["scans"], "size_bytes": index["size_bytes"]}
+
+
+async def ensure_indexes(engine: AsyncEngine):
+    """
+    Creates the extensions, functions and indexes the query endpoints rely on. Missing indexes
+    are built, and indexes left invalid by an interrupted concurrent build are rebuilt
+    """
+    async with engine.connect() as conn:
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": INDEX_LOCK_KEY})
+        try:
+            for statement in _TRIGRAM_SETUP + (_UNACCENT_SETUP if config.UNACCENT_SEARCH else ()):
+                await conn.execute(text(statement))
+            existing = await _existing_indexes(conn)
+            for index in expected_indexes():
+                if index.name in existing and existing[index.name]["valid"]:
+                    continue
+                if index.name in existing:
+                    logger.warning(f"Índice inválido {index.name} será reconstruído")
+                    await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {models.db_schema}.{index.name}"))
+                logger.info(f"Criando índice {index.name}...")
+                await conn.execute(text(index.create_statement()))
+        finally:
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": INDEX_LOCK_KEY})
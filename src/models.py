@@ -3,6 +3,10 @@ import datetime as dt
 from typing import List, Optional
 
 db_schema = 'api_transferegov_especiais'
+# Text columns holding codes and identifiers are filtered by equality instead of ilike (see src/filters.py)
+EXACT_MATCH = {"info": {"filter": "eq"}}
+# Foreign keys and selective equality filters are declared with index=True; besides create_all,
+# the indexes are built on existing tables by src/indexes.py
 
 class BaseModel(SQLModel, table=False):
     """Base class for all SQLModel subclasses"""
@@ -17,7 +21,7 @@ class ProgramaEspecial(BaseModel, table=True):
     id_programa: int = Field(primary_key=True)
     ano_programa: int
     modalidade_programa: str
-    codigo_programa: str
+    codigo_programa: str = Field(index=True, sa_column_kwargs=EXACT_MATCH)
     id_orgao_superior_programa: int
     sigla_orgao_superior_programa: str
     nome_orgao_superior_programa: str
@@ -37,45 +41,53 @@ class ProgramaEspecial(BaseModel, table=True):
     valor_obs_geradas_programa: float
     valor_disponibilidade_atual_programa: float
 
+    planos_acao: List["PlanoAcaoEspecial"] = Relationship(back_populates="programa")
+
 
 class PlanoAcaoEspecial(BaseModel, table=True):
     __tablename__ = "plano_acao_especial"
 
     id_plano_acao: int = Field(primary_key=True)
-    codigo_plano_acao: str
+    codigo_plano_acao: str = Field(index=True, sa_column_kwargs=EXACT_MATCH)
     ano_plano_acao: int
     modalidade_plano_acao: str
     situacao_plano_acao: str
-    cnpj_beneficiario_plano_acao: str
+    cnpj_beneficiario_plano_acao: str = Field(index=True, sa_column_kwargs=EXACT_MATCH)
     nome_beneficiario_plano_acao: str
-    uf_beneficiario_plano_acao: str
-    codigo_banco_plano_acao: str
+    uf_beneficiario_plano_acao: str = Field(index=True, sa_column_kwargs=EXACT_MATCH)
+    codigo_banco_plano_acao: str = Field(sa_column_kwargs=EXACT_MATCH)
     codigo_situacao_dado_bancario_plano_acao: int
     nome_banco_plano_acao: str
     numero_agencia_plano_acao: int
-    dv_agencia_plano_acao: str
-    numero_conta_plano_acao: str
-    dv_conta_plano_acao: str
+    dv_agencia_plano_acao: str = Field(sa_column_kwargs=EXACT_MATCH)
+    numero_conta_plano_acao: str = Field(sa_column_kwargs=EXACT_MATCH)
+    dv_conta_plano_acao: str = Field(sa_column_kwargs=EXACT_MATCH)
     nome_parlamentar_emenda_plano_acao: str
-    ano_emenda_parlamentar_plano_acao: str
-    codigo_parlamentar_emenda_plano_acao: str
+    ano_emenda_parlamentar_plano_acao: str = Field(sa_column_kwargs=EXACT_MATCH)
+    codigo_parlamentar_emenda_plano_acao: str = Field(sa_column_kwargs=EXACT_MATCH)
     sequencial_emenda_parlamentar_plano_acao: int
-    numero_emenda_parlamentar_plano_acao: str
-    codigo_emenda_parlamentar_formatado_plano_acao: str
+    numero_emenda_parlamentar_plano_acao: str = Field(sa_column_kwargs=EXACT_MATCH)
+    codigo_emenda_parlamentar_formatado_plano_acao: str = Field(sa_column_kwargs=EXACT_MATCH)
     codigo_descricao_areas_politicas_publicas_plano_acao: str
     descricao_programacao_orcamentaria_plano_acao: str
     motivo_impedimento_plano_acao: str
     valor_custeio_plano_acao: float
     valor_investimento_plano_acao: float
-    id_programa: int = Field(foreign_key=f"{db_schema}.programa_especial.id_programa")
+    id_programa: int = Field(foreign_key=f"{db_schema}.programa_especial.id_programa", index=True)
+
+    programa: Optional[ProgramaEspecial] = Relationship(back_populates="planos_acao")
+    empenhos: List["EmpenhoEspecial"] = Relationship(back_populates="plano_acao")
+    executores: List["ExecutorEspecial"] = Relationship(back_populates="plano_acao")
+    relatorios_gestao: List["RelatorioGestaoEspecial"] = Relationship(back_populates="plano_acao")
+    planos_trabalho: List["PlanoTrabalhoEspecial"] = Relationship(back_populates="plano_acao")
 
 
 class EmpenhoEspecial(BaseModel, table=True):
     __tablename__ = "empenho_especial"
 
     id_empenho: int = Field(primary_key=True)
-    id_minuta_empenho: str
-    numero_empenho: str
+    id_minuta_empenho: str = Field(sa_column_kwargs=EXACT_MATCH)
+    numero_empenho: str = Field(index=True, sa_column_kwargs=EXACT_MATCH)
     situacao_empenho: int
     descricao_situacao_empenho: str
     tipo_documento_empenho: int
@@ -84,30 +96,33 @@ class EmpenhoEspecial(BaseModel, table=True):
     ug_responsavel_empenho: int
     ug_emitente_empenho: int
     descricao_ug_emitente_empenho: str
-    fonte_recurso_empenho: str
+    fonte_recurso_empenho: str = Field(sa_column_kwargs=EXACT_MATCH)
     plano_interno_empenho: str
     ptres_empenho: int
-    grupo_natureza_despesa_empenho: str
-    natureza_despesa_empenho: str
-    subitem_empenho: str
+    grupo_natureza_despesa_empenho: str = Field(sa_column_kwargs=EXACT_MATCH)
+    natureza_despesa_empenho: str = Field(sa_column_kwargs=EXACT_MATCH)
+    subitem_empenho: str = Field(sa_column_kwargs=EXACT_MATCH)
     categoria_despesa_empenho: str
     modalidade_despesa_empenho: int
-    cnpj_beneficiario_empenho: str
+    cnpj_beneficiario_empenho: str = Field(index=True, sa_column_kwargs=EXACT_MATCH)
     nome_beneficiario_empenho: str
-    uf_beneficiario_empenho: str
-    numero_ro_empenho: str
+    uf_beneficiario_empenho: str = Field(index=True, sa_column_kwargs=EXACT_MATCH)
+    numero_ro_empenho: str = Field(sa_column_kwargs=EXACT_MATCH)
     data_emissao_empenho: dt.date
     prioridade_desbloqueio_empenho: int
     valor_empenho: float
-    id_plano_acao: int = Field(foreign_key=f"{db_schema}.plano_acao_especial.id_plano_acao")
+    id_plano_acao: int = Field(foreign_key=f"{db_schema}.plano_acao_especial.id_plano_acao", index=True)
+
+    plano_acao: Optional[PlanoAcaoEspecial] = Relationship(back_populates="empenhos")
+    documentos_habeis: List["DocumentoHabilEspecial"] = Relationship(back_populates="empenho")
 
 
 class DocumentoHabilEspecial(BaseModel, table=True):
     __tablename__ = "documento_habil_especial"
 
     id_dh: int = Field(primary_key=True)
-    id_minuta_documento_habil: str
-    numero_documento_habil: str
+    id_minuta_documento_habil: str = Field(sa_column_kwargs=EXACT_MATCH)
+    numero_documento_habil: str = Field(index=True, sa_column_kwargs=EXACT_MATCH)
     situacao_dh: int
     descricao_situacao_dh: str
     tipo_documento_dh: str
@@ -117,17 +132,20 @@ class DocumentoHabilEspecial(BaseModel, table=True):
     data_emissao_dh: dt.date
     ug_pagadora_dh: int
     descricao_ug_pagadora_dh: str
-    variacao_patrimonial_diminuta_dh: str
-    passivo_transferencia_constitucional_legal_dh: str
-    centro_custo_empenho: str
+    variacao_patrimonial_diminuta_dh: str = Field(sa_column_kwargs=EXACT_MATCH)
+    passivo_transferencia_constitucional_legal_dh: str = Field(sa_column_kwargs=EXACT_MATCH)
+    centro_custo_empenho: str = Field(sa_column_kwargs=EXACT_MATCH)
     codigo_siorg_empenho: int
-    mes_referencia_empenho: str
+    mes_referencia_empenho: str = Field(sa_column_kwargs=EXACT_MATCH)
     ano_referencia_empenho: int
     ug_beneficiada_dh: int
     descricao_ug_beneficiada_dh: str
     valor_dh: float
     valor_rateio_dh: float
-    id_empenho: int = Field(foreign_key=f"{db_schema}.empenho_especial.id_empenho") 
+    id_empenho: int = Field(foreign_key=f"{db_schema}.empenho_especial.id_empenho", index=True) 
+
+    empenho: Optional[EmpenhoEspecial] = Relationship(back_populates="documentos_habeis")
+    ordens_pagamento: List["OrdemPagamentoOrdemBancariaEspecial"] = Relationship(back_populates="documento_habil")
 
 
 class OrdemPagamentoOrdemBancariaEspecial(BaseModel, table=True):
@@ -135,17 +153,20 @@ class OrdemPagamentoOrdemBancariaEspecial(BaseModel, table=True):
 
     id_op_ob: int = Field(primary_key=True)
     data_emissao_op: dt.date
-    numero_ordem_pagamento: str
+    numero_ordem_pagamento: str = Field(index=True, sa_column_kwargs=EXACT_MATCH)
     vinculacao_op: int
     situacao_op: int
     descricao_situacao_op: str
     data_situacao_op: dt.date
     data_emissao_ob: dt.date
-    numero_ordem_bancaria: str
-    numero_ordem_lancamento: str
+    numero_ordem_bancaria: str = Field(index=True, sa_column_kwargs=EXACT_MATCH)
+    numero_ordem_lancamento: str = Field(sa_column_kwargs=EXACT_MATCH)
     data_assinatura_ordenador_despesa_ob: dt.date
     data_assinatura_gestor_financeiro_ob: dt.date
-    id_dh: int = Field(foreign_key=f"{db_schema}.documento_habil_especial.id_dh")
+    id_dh: int = Field(foreign_key=f"{db_schema}.documento_habil_especial.id_dh", index=True)
+
+    documento_habil: Optional[DocumentoHabilEspecial] = Relationship(back_populates="ordens_pagamento")
+    historicos_pagamento: List["HistoricoPagamentoEspecial"] = Relationship(back_populates="ordem_pagamento")
 
 
 class HistoricoPagamentoEspecial(BaseModel, table=True):
@@ -155,7 +176,9 @@ class HistoricoPagamentoEspecial(BaseModel, table=True):
     data_hora_historico_op: dt.datetime
     historico_situacao_op: int
     descricao_historico_situacao_op: str
-    id_op_ob: int = Field(foreign_key=f"{db_schema}.ordem_pagamento_ordem_bancaria_especial.id_op_ob")
+    id_op_ob: int = Field(foreign_key=f"{db_schema}.ordem_pagamento_ordem_bancaria_especial.id_op_ob", index=True)
+
+    ordem_pagamento: Optional[OrdemPagamentoOrdemBancariaEspecial] = Relationship(back_populates="historicos_pagamento")
 
 
 class RelatorioGestaoEspecial(BaseModel, table=True):
@@ -164,7 +187,9 @@ class RelatorioGestaoEspecial(BaseModel, table=True):
     id_relatorio_gestao: int = Field(primary_key=True)
     situacao_relatorio_gestao: str
     parecer_relatorio_gestao: str
-    id_plano_acao: int = Field(foreign_key=f"{db_schema}.plano_acao_especial.id_plano_acao")
+    id_plano_acao: int = Field(foreign_key=f"{db_schema}.plano_acao_especial.id_plano_acao", index=True)
+
+    plano_acao: Optional[PlanoAcaoEspecial] = Relationship(back_populates="relatorios_gestao")
 
 
 class PlanoTrabalhoEspecial(BaseModel, table=True):
@@ -172,33 +197,39 @@ class PlanoTrabalhoEspecial(BaseModel, table=True):
 
     id_plano_trabalho: int = Field(primary_key=True)
     situacao_plano_trabalho: str
-    ind_orcamento_proprio_plano_trabalho: str
+    ind_orcamento_proprio_plano_trabalho: str = Field(sa_column_kwargs=EXACT_MATCH)
     data_inicio_execucao_plano_trabalho: dt.datetime
     data_fim_execucao_plano_trabalho: dt.datetime
     prazo_execucao_meses_plano_trabalho: int
-    id_plano_acao: int = Field(foreign_key=f"{db_schema}.plano_acao_especial.id_plano_acao")
+    id_plano_acao: int = Field(foreign_key=f"{db_schema}.plano_acao_especial.id_plano_acao", index=True)
     classificacao_orcamentaria_pt: str
     ind_justificativa_prorrogacao_atraso_pt: bool
     ind_justificativa_prorrogacao_paralizacao_pt: bool
     justificativa_prorrogacao_pt: str
 
+    plano_acao: Optional[PlanoAcaoEspecial] = Relationship(back_populates="planos_trabalho")
+
 
 class ExecutorEspecial(BaseModel, table=True):
     __tablename__ = "executor_especial"
 
-    id_plano_acao: int = Field(foreign_key=f"{db_schema}.plano_acao_especial.id_plano_acao")
+    id_plano_acao: int = Field(foreign_key=f"{db_schema}.plano_acao_especial.id_plano_acao", index=True)
     id_executor: int = Field(primary_key=True)
-    cnpj_executor: str
+    cnpj_executor: str = Field(index=True, sa_column_kwargs=EXACT_MATCH)
     nome_executor: str
     objeto_executor: str
     vl_custeio_executor: float
     vl_investimento_executor: float
 
+    plano_acao: Optional[PlanoAcaoEspecial] = Relationship(back_populates="executores")
+    metas: List["MetaEspecial"] = Relationship(back_populates="executor")
+    finalidades: List["FinalidadeEspecial"] = Relationship(back_populates="executor")
+
 
 class MetaEspecial(BaseModel, table=True):
     __tablename__ = "meta_especial"
 
-    id_executor: int = Field(foreign_key=f"{db_schema}.executor_especial.id_executor")
+    id_executor: int = Field(foreign_key=f"{db_schema}.executor_especial.id_executor", index=True)
     id_meta: int = Field(primary_key=True)
     sequencial_meta: int
     nome_meta: str
@@ -215,6 +246,8 @@ class MetaEspecial(BaseModel, table=True):
     vl_investimento_doacao_meta: float
     qt_meses_meta: int
 
+    executor: Optional[ExecutorEspecial] = Relationship(back_populates="metas")
+
 
 class FinalidadeEspecial(BaseModel, table=True):
     __tablename__ = "finalidade_especial"
@@ -224,3 +257,5 @@ class FinalidadeEspecial(BaseModel, table=True):
     area_politica_publica_tipo_pt: str
     cd_area_politica_publica_pt: int = Field(default=None, primary_key=True)
     area_politica_publica_pt: str
+
+    executor: Optional[ExecutorEspecial] = Relationship(back_populates="finalidades")
@@ -0,0 +1,85 @@
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncSession
+from dataclasses import asdict
+from typing import List, Optional
+from src.aggregates import AGGREGATES, AGGREGATE_CACHE_PREFIX, get_aggregate_data, refresh_aggregates
+from src.utils import get_session, verify_admin, config, logger
+from src.schemas import (AgregadoResponse, DimensaoEmpenhoUfAno, DimensaoPlanoAcaoParlamentar, DimensaoPagamentoPrograma,
+                         FiltrosAgregadoEmpenhoUfAno, FiltrosAgregadoPlanoAcaoParlamentar, FiltrosAgregadoPagamentoPrograma)
+from src.cache import cached
+
+agregados_router = APIRouter(prefix="/agregados", tags=["Agregados"])
+
+
+async def _aggregate_response(agregado: str, agrupar_por: Optional[list], filtros, dbsession: AsyncSession) -> dict:
+    view = AGGREGATES[agregado]
+    group_by = [dimension.value for dimension in agrupar_por or []]
+    try:
+        data = await get_aggregate_data(view, group_by, asdict(filtros), dbsession)
+    except ProgrammingError as e:
+        # The views are created in background at startup; until then the relation does not exist
+        logger.error(f"Erro ao consultar o agregado {agregado}: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail=config.ERROR_MESSAGE_AGGREGATE_UNAVAILABLE)
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                            detail=config.ERROR_MESSAGE_INTERNAL)
+    return {"agregado": agregado, "agrupado_por": group_by or list(view.dimensions), "data": data}
+
+
+@agregados_router.get("/empenho_uf_ano",
+                status_code=status.HTTP_200_OK,
+                description="Retorna a quantidade e o valor total dos Empenhos Especiais por UF do beneficiário, ano de emissão e programa.",
+                response_description="Totais de Empenhos Especiais",
+                response_model=AgregadoResponse
+                )
+@cached(ttl=config.CACHE_TTL, prefix=AGGREGATE_CACHE_PREFIX, tables=(AGGREGATES["empenho_uf_ano"].name,))
+async def agregado_empenho_uf_ano(
+    agrupar_por: Optional[List[DimensaoEmpenhoUfAno]] = Query(None, description=config.GROUP_BY_DESCRIPTION),
+    filtros: FiltrosAgregadoEmpenhoUfAno = Depends(),
+    dbsession: AsyncSession = Depends(get_session)
+):
+    return await _aggregate_response("empenho_uf_ano", agrupar_por, filtros, dbsession)
+
+
+@agregados_router.get("/plano_acao_parlamentar",
+                status_code=status.HTTP_200_OK,
+                description="Retorna a quantidade de Planos de Ação Especiais e os valores totais de custeio e investimento por parlamentar, ano e UF do beneficiário.",
+                response_description="Totais de Planos de Ação Especiais",
+                response_model=AgregadoResponse
+                )
+@cached(ttl=config.CACHE_TTL, prefix=AGGREGATE_CACHE_PREFIX, tables=(AGGREGATES["plano_acao_parlamentar"].name,))
+async def agregado_plano_acao_parlamentar(
+    agrupar_por: Optional[List[DimensaoPlanoAcaoParlamentar]] = Query(None, description=config.GROUP_BY_DESCRIPTION),
+    filtros: FiltrosAgregadoPlanoAcaoParlamentar = Depends(),
+    dbsession: AsyncSession = Depends(get_session)
+):
+    return await _aggregate_response("plano_acao_parlamentar", agrupar_por, filtros, dbsession)
+
+
+@agregados_router.get("/pagamento_programa",
+                status_code=status.HTTP_200_OK,
+                description="Retorna, por programa, a quantidade e os valores totais dos Documentos Hábeis e a quantidade de Ordens Bancárias emitidas.",
+                response_description="Totais de Documentos Hábeis e Ordens Bancárias",
+                response_model=AgregadoResponse
+                )
+@cached(ttl=config.CACHE_TTL, prefix=AGGREGATE_CACHE_PREFIX, tables=(AGGREGATES["pagamento_programa"].name,))
+async def agregado_pagamento_programa(
+    agrupar_por: Optional[List[DimensaoPagamentoPrograma]] = Query(None, description=config.GROUP_BY_DESCRIPTION),
+    filtros: FiltrosAgregadoPagamentoPrograma = Depends(),
+    dbsession: AsyncSession = Depends(get_session)
+):
+    return await _aggregate_response("pagamento_programa", agrupar_por, filtros, dbsession)
+
+
+@agregados_router.post("/atualizar", include_in_schema=False)
+async def atualiza_agregados(username: str = Depends(verify_admin)):
+    """
+    Recomputes the aggregate views, e.g. at the end of a data load
+    """
+    from main import db
+    if not await refresh_aggregates(db.engine):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail="Os agregados já estão sendo atualizados.")
+    return {"atualizado": True}
@@ -1,14 +1,15 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select, and_, cast, Date
+from dataclasses import asdict
 from src import models
-from src.utils import get_session, get_paginated_data, config
-from src.schemas import PaginatedResponseTemplate, PaginatedExecutorEspecialResponse
-from datetime import date
-from typing import Optional
-from src.cache import cache
+from src.filters import FilterEngine
+from src.utils import get_session, get_paginated_data, parse_fields, get_tree_data, tree_tables, export_records, config, Paginacao, Exportacao
+from src.schemas import PaginatedResponseTemplate, PaginatedExecutorEspecialResponse, FiltrosExecutorEspecial, ExecutorEspecialArvore
+from src.cache import cached
 
 ex_router = APIRouter(tags=["Executor Especial"])
+ex_filters = FilterEngine(models.ExecutorEspecial)
 
 
 
@@ -16,47 +17,74 @@ ex_router = APIRouter(tags=["Executor Especial"])
                 status_code=status.HTTP_200_OK,
                 description="Retorna uma Lista Paginada dos dados dos Executores Especiais.",
                 response_description="Lista Paginada de Executor Especial",
-                response_model=PaginatedExecutorEspecialResponse
+                response_model=PaginatedExecutorEspecialResponse,
+                response_model_exclude_unset=True
                 )
-@cache(ttl=config.CACHE_TTL)
+@cached(ttl=config.CACHE_TTL, filters=ex_filters)
 async def consulta_executor_especial(
-    id_executor: Optional[int] = Query(None, description="Identificador Único do Executor Especial"),
-    id_plano_acao: Optional[int] = Query(None, description="Identificador Único do Plano de Ação correspondente"),
-    cnpj_executor: Optional[str] = Query(None, description="CNPJ do Executor Especial"),
-    nome_executor: Optional[str] = Query(None, description="Nome do Executor Especial"),
-    objeto_executor: Optional[str] = Query(None, description="Objeto do Executor Especial"),
-    vl_custeio_executor: Optional[float] = Query(None, description="Valor de Custeio do Executor Especial", ge=0),
-    vl_investimento_executor: Optional[float] = Query(None, description="Valor de Investimento do Executor Especial", ge=0),
-    pagina: int = Query(1, ge=1, description="Número da Página"),
-    tamanho_da_pagina: int = Query(config.DEFAULT_PAGE_SIZE, le=config.MAX_PAGE_SIZE, ge=1, description="Tamanho da Página"),
+    filtros: FiltrosExecutorEspecial = Depends(),
+    paginacao: Paginacao = Depends(),
     dbsession: AsyncSession = Depends(get_session)
 ):
-    params = locals().copy()
-    params_list = list(params.keys())[:-3]    
-    
-    if all([params[_name] is None for _name in params_list]):
+    params = ex_filters.active(asdict(filtros))
+    fields = parse_fields(ex_filters, paginacao.campos)
+
+    if not params and paginacao.cursor is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="Nenhum parâmetro de consulta foi informado.")
     
     try:
-        query = select(models.ExecutorEspecial).where(
-            and_(
-                models.ExecutorEspecial.id_executor == id_executor if id_executor else True,
-                models.ExecutorEspecial.id_plano_acao == id_plano_acao if id_plano_acao else True,
-                models.ExecutorEspecial.cnpj_executor.ilike(f"%{cnpj_executor}%") if cnpj_executor else True,
-                models.ExecutorEspecial.nome_executor.ilike(f"%{nome_executor}%") if nome_executor else True,
-                models.ExecutorEspecial.objeto_executor.ilike(f"%{objeto_executor}%") if objeto_executor else True,
-                models.ExecutorEspecial.vl_custeio_executor == vl_custeio_executor if vl_custeio_executor else True,
-                models.ExecutorEspecial.vl_investimento_executor == vl_investimento_executor if vl_investimento_executor else True
-            )
-        )        
+        query, values = ex_filters.build(params, fields)
         result = await get_paginated_data(query=query,
                                           dbsession=dbsession,
                                           response_schema=PaginatedResponseTemplate, 
-                                          current_page=pagina, 
-                                          records_per_page=tamanho_da_pagina)
+                                          current_page=paginacao.pagina, 
+                                          records_per_page=paginacao.tamanho_da_pagina,
+                                          cursor=paginacao.cursor,
+                                          count_mode=paginacao.contagem,
+                                          params=values)
         return result
     
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                            detail=config.ERROR_MESSAGE_INTERNAL)
+
+
+@ex_router.get("/executor_especial/exportar",
+                status_code=status.HTTP_200_OK,
+                description="Exporta, sem paginação, os dados dos Executores Especiais em NDJSON, CSV, Parquet ou Arrow. Os filtros são opcionais.",
+                response_description="Arquivo de Executor Especial",
+                response_class=StreamingResponse
+                )
+async def exporta_executor_especial(
+    filtros: FiltrosExecutorEspecial = Depends(),
+    exportacao: Exportacao = Depends()
+):
+    fields = parse_fields(ex_filters, exportacao.campos)
+    query, values = ex_filters.build(ex_filters.active(asdict(filtros)), fields)
+    return export_records(query, values, exportacao.formato, "executor_especial")
+
+
+@ex_router.get("/executor_especial/{id_executor}/arvore",
+                status_code=status.HTTP_200_OK,
+                description="Retorna o Executor Especial informado com os registros dependentes aninhados, até a profundidade indicada em 'expandir'.",
+                response_description="Executor Especial com os registros dependentes",
+                response_model=ExecutorEspecialArvore
+                )
+@cached(ttl=config.CACHE_TTL, tables=tree_tables(models.ExecutorEspecial))
+async def arvore_executor_especial(
+    id_executor: int,
+    expandir: int = Query(1, ge=0, le=config.MAX_EXPAND_DEPTH, description=config.EXPAND_DESCRIPTION),
+    dbsession: AsyncSession = Depends(get_session)
+):
+    try:
+        result = await get_tree_data(models.ExecutorEspecial, id_executor, expandir, dbsession)
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                            detail=config.ERROR_MESSAGE_INTERNAL)
\ No newline at end of file
+                            detail=config.ERROR_MESSAGE_INTERNAL)
+    if result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=config.ERROR_MESSAGE_NOT_FOUND)
+    return result
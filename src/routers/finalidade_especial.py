@@ -1,14 +1,15 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Query
+from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select, and_, cast, Date
+from dataclasses import asdict
 from src import models
-from src.utils import get_session, get_paginated_data, config
-from src.schemas import PaginatedResponseTemplate, PaginatedFinalidadeEspecialResponse
-from datetime import date
-from typing import Optional
-from src.cache import cache
+from src.filters import FilterEngine
+from src.utils import get_session, get_paginated_data, parse_fields, export_records, config, Paginacao, Exportacao
+from src.schemas import PaginatedResponseTemplate, PaginatedFinalidadeEspecialResponse, FiltrosFinalidadeEspecial
+from src.cache import cached
 
 fe_router = APIRouter(tags=["Finalidade Especial"])
+fe_filters = FilterEngine(models.FinalidadeEspecial)
 
 
 
@@ -16,44 +17,51 @@ fe_router = APIRouter(tags=["Finalidade Especial"])
                 status_code=status.HTTP_200_OK,
                 description="Retorna uma Lista Paginada dos dados das Finalidades Especiais.",
                 response_description="Lista Paginada de Finalidade Especial",
-                response_model=PaginatedFinalidadeEspecialResponse
+                response_model=PaginatedFinalidadeEspecialResponse,
+                response_model_exclude_unset=True
                 )
-@cache(ttl=config.CACHE_TTL)
+@cached(ttl=config.CACHE_TTL, filters=fe_filters)
 async def consulta_finalidade_especial(
-    id_executor: Optional[int] = Query(None, description="Identificador Único do Executor Especial"),
-    cd_area_politica_publica_tipo_pt: Optional[int] = Query(None, description="Código do tipo de política pública da Finalidade Plano de Trabalho Especial"),
-    area_politica_publica_tipo_pt: Optional[str] = Query(None, description="Descrição do tipo de política pública da Finalidade do Plano de Trabalho Especial"),
-    cd_area_politica_publica_pt: Optional[int] = Query(None, description="Código da área da política pública da Finalidade do Plano de Trabalho Especial"),
-    area_politica_publica_pt: Optional[str] = Query(None, description="Descrição da área da política pública da Finalidade do Plano de Trabalho Especial"),
-    pagina: int = Query(1, ge=1, description="Número da Página"),
-    tamanho_da_pagina: int = Query(config.DEFAULT_PAGE_SIZE, le=config.MAX_PAGE_SIZE, ge=1, description="Tamanho da Página"),
+    filtros: FiltrosFinalidadeEspecial = Depends(),
+    paginacao: Paginacao = Depends(),
     dbsession: AsyncSession = Depends(get_session)
 ):
-    params = locals().copy()
-    params_list = list(params.keys())[:-3]    
-    
-    if all([params[_name] is None for _name in params_list]):
+    params = fe_filters.active(asdict(filtros))
+    fields = parse_fields(fe_filters, paginacao.campos)
+
+    if not params and paginacao.cursor is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="Nenhum parâmetro de consulta foi informado.")
     
     try:
-        query = select(models.FinalidadeEspecial).where(
-            and_(
-                models.FinalidadeEspecial.id_executor == id_executor if id_executor else True,
-                models.FinalidadeEspecial.cd_area_politica_publica_tipo_pt == cd_area_politica_publica_tipo_pt if cd_area_politica_publica_tipo_pt else True,
-                models.FinalidadeEspecial.area_politica_publica_tipo_pt.ilike(f"%{area_politica_publica_tipo_pt}%") if area_politica_publica_tipo_pt else True,
-                models.FinalidadeEspecial.cd_area_politica_publica_pt == cd_area_politica_publica_pt if cd_area_politica_publica_pt else True,
-                models.FinalidadeEspecial.area_politica_publica_pt.ilike(f"%{area_politica_publica_pt}%") if area_politica_publica_pt else True
-            )
-        )
-        # print(query.compile(compile_kwargs={"literal_binds":True}))
+        query, values = fe_filters.build(params, fields)
         result = await get_paginated_data(query=query,
                                           dbsession=dbsession,
                                           response_schema=PaginatedResponseTemplate, 
-                                          current_page=pagina, 
-                                          records_per_page=tamanho_da_pagina)
+                                          current_page=paginacao.pagina, 
+                                          records_per_page=paginacao.tamanho_da_pagina,
+                                          cursor=paginacao.cursor,
+                                          count_mode=paginacao.contagem,
+                                          params=values)
         return result
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                            detail=config.ERROR_MESSAGE_INTERNAL)
\ No newline at end of file
+                            detail=config.ERROR_MESSAGE_INTERNAL)
+
+
+@fe_router.get("/finalidade_especial/exportar",
+                status_code=status.HTTP_200_OK,
+                description="Exporta, sem paginação, os dados das Finalidades Especiais em NDJSON, CSV, Parquet ou Arrow. Os filtros são opcionais.",
+                response_description="Arquivo de Finalidade Especial",
+                response_class=StreamingResponse
+                )
+async def exporta_finalidade_especial(
+    filtros: FiltrosFinalidadeEspecial = Depends(),
+    exportacao: Exportacao = Depends()
+):
+    fields = parse_fields(fe_filters, exportacao.campos)
+    query, values = fe_filters.build(fe_filters.active(asdict(filtros)), fields)
+    return export_records(query, values, exportacao.formato, "finalidade_especial")
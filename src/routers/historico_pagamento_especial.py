@@ -1,58 +1,66 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Query
+from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select, and_, cast, Date
+from dataclasses import asdict
 from src import models
-from src.utils import get_session, get_paginated_data, config
-from src.schemas import PaginatedResponseTemplate, PaginatedHistoricoPagamentoEspecialResponse
-from datetime import date
-from typing import Optional
-from src.cache import cache
+from src.filters import FilterEngine
+from src.utils import get_session, get_paginated_data, parse_fields, export_records, config, Paginacao, Exportacao
+from src.schemas import PaginatedResponseTemplate, PaginatedHistoricoPagamentoEspecialResponse, FiltrosHistoricoPagamentoEspecial
+from src.cache import cached
 
 hist_router = APIRouter(tags=["Histórico de Pagamento Especial"])
+hist_filters = FilterEngine(models.HistoricoPagamentoEspecial)
 
 
 @hist_router.get("/historico_pagamento_especial",
                 status_code=status.HTTP_200_OK,
                 description="Retorna uma Lista Paginada do histórico de pagamentos.",
                 response_description="Lista Paginada de Histório de Pagamentos",
-                response_model=PaginatedHistoricoPagamentoEspecialResponse
+                response_model=PaginatedHistoricoPagamentoEspecialResponse,
+                response_model_exclude_unset=True
                 )
-@cache(ttl=config.CACHE_TTL)
+@cached(ttl=config.CACHE_TTL, filters=hist_filters)
 async def consulta_historico_pagamento_especial(
-    id_historico_op_ob : Optional[int] = Query(None, description="Identificador Único do Histórico de Pagamento"),
-    data_hora_historico_op : Optional[str] = Query(None, description="Data do Histórico de Pagamento<br/>Ex.: 2024-12-11", pattern=r"^\d{4}-\d{2}-\d{2}$", examples=["2024-12-11"]),
-    historico_situacao_op : Optional[int] = Query(None, description="Código da Situação da Ordem de Pagamento/Bancária"),
-    descricao_historico_situacao_op : Optional[str] = Query(None, description="Descrição da Situação da Ordem de Pagamento/Bancária"),
-    id_op_ob : Optional[int] = Query(None, description="Identificador Único da Ordem de Pagamento e Ordem Bancária (OP/OB)"),
-    pagina: int = Query(1, ge=1, description="Número da Página"),
-    tamanho_da_pagina: int = Query(config.DEFAULT_PAGE_SIZE, le=config.MAX_PAGE_SIZE, ge=1, description="Tamanho da Página"),
+    filtros: FiltrosHistoricoPagamentoEspecial = Depends(),
+    paginacao: Paginacao = Depends(),
     dbsession: AsyncSession = Depends(get_session)
 ):
+    params = hist_filters.active(asdict(filtros))
+    fields = parse_fields(hist_filters, paginacao.campos)
 
-    params = locals().copy()
-    params_list = list(params.keys())[:-3]    
-    
-    if not any([params[_name] for _name in params_list]):
+    if not params and paginacao.cursor is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="Nenhum parâmetro de consulta foi informado.")
     
     try:
-        query = select(models.HistoricoPagamentoEspecial).where(
-            and_(
-                models.HistoricoPagamentoEspecial.id_historico_op_ob == id_historico_op_ob if id_historico_op_ob else True,
-                cast(models.HistoricoPagamentoEspecial.data_hora_historico_op, Date) == date.fromisoformat(data_hora_historico_op) if data_hora_historico_op else True,
-                models.HistoricoPagamentoEspecial.historico_situacao_op == historico_situacao_op if historico_situacao_op else True,
-                models.HistoricoPagamentoEspecial.descricao_historico_situacao_op.ilike(f"%{descricao_historico_situacao_op}%") if descricao_historico_situacao_op else True,
-                models.HistoricoPagamentoEspecial.id_op_ob == id_op_ob if id_op_ob else True
-            )
-        )
+        query, values = hist_filters.build(params, fields)
         result = await get_paginated_data(query=query,
                                           dbsession=dbsession,
                                           response_schema=PaginatedResponseTemplate, 
-                                          current_page=pagina, 
-                                          records_per_page=tamanho_da_pagina)
+                                          current_page=paginacao.pagina, 
+                                          records_per_page=paginacao.tamanho_da_pagina,
+                                          cursor=paginacao.cursor,
+                                          count_mode=paginacao.contagem,
+                                          params=values)
         return result
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                            detail=config.ERROR_MESSAGE_INTERNAL)
\ No newline at end of file
+                            detail=config.ERROR_MESSAGE_INTERNAL)
+
+
+@hist_router.get("/historico_pagamento_especial/exportar",
+                status_code=status.HTTP_200_OK,
+                description="Exporta, sem paginação, o histórico de pagamentos em NDJSON, CSV, Parquet ou Arrow. Os filtros são opcionais.",
+                response_description="Arquivo de Histórico de Pagamentos",
+                response_class=StreamingResponse
+                )
+async def exporta_historico_pagamento_especial(
+    filtros: FiltrosHistoricoPagamentoEspecial = Depends(),
+    exportacao: Exportacao = Depends()
+):
+    fields = parse_fields(hist_filters, exportacao.campos)
+    query, values = hist_filters.build(hist_filters.active(asdict(filtros)), fields)
+    return export_records(query, values, exportacao.formato, "historico_pagamento_especial")
@@ -0,0 +1,97 @@
+from fastapi import APIRouter, HTTPException, Response, status
+from pydantic import TypeAdapter, ValidationError
+from dataclasses import fields
+import asyncio
+import logging
+import orjson
+from src.utils import config, Paginacao
+from src.schemas import (RequisicaoLote, RespostaLote, ResultadoLote, ConsultaLote,
+                         FiltrosProgramaEspecial, FiltrosPlanoAcaoEspecial, FiltrosEmpenhoEspecial,
+                         FiltrosDocumentoHabilEspecial, FiltrosOrdemPagamentoOrdemBancariaEspecial,
+                         FiltrosHistoricoPagamentoEspecial, FiltrosRelatorioGestaoEspecial,
+                         FiltrosPlanoTrabalhoEspecial, FiltrosExecutorEspecial, FiltrosMetaEspecial,
+                         FiltrosFinalidadeEspecial)
+from src.routers.programa_especial import consulta_programa_especial
+from src.routers.plano_acao_especial import consulta_plano_acao_especial
+from src.routers.empenho_especial import consulta_empenho_especial
+from src.routers.documento_habil import consulta_documento_habil_especial
+from src.routers.ordem_pagamento_especial import consulta_ordem_pagamento_ordem_bancaria_especial
+from src.routers.historico_pagamento_especial import consulta_historico_pagamento_especial
+from src.routers.relatorio_gestao_especial import consulta_relatorio_gestao_especial
+from src.routers.plano_trabalho_especial import consulta_plano_trabalho_especial
+from src.routers.executor_especial import consulta_executor_especial
+from src.routers.meta_especial import consulta_meta_especial
+from src.routers.finalidade_especial import consulta_finalidade_especial
+
+lote_router = APIRouter(tags=["Consulta em Lote"])
+logger = logging.getLogger(__name__)
+
+# Paginated endpoint and filters of each resource, by the name used in its path.
+# The endpoints are called as they are, so every sub-query goes through their cache
+RECURSOS = {
+    "programa_especial": (consulta_programa_especial, FiltrosProgramaEspecial),
+    "plano_acao_especial": (consulta_plano_acao_especial, FiltrosPlanoAcaoEspecial),
+    "empenho_especial": (consulta_empenho_especial, FiltrosEmpenhoEspecial),
+    "documento_habil_especial": (consulta_documento_habil_especial, FiltrosDocumentoHabilEspecial),
+    "ordem_pagamento_ordem_bancaria_especial": (consulta_ordem_pagamento_ordem_bancaria_especial, FiltrosOrdemPagamentoOrdemBancariaEspecial),
+    "historico_pagamento_especial": (consulta_historico_pagamento_especial, FiltrosHistoricoPagamentoEspecial),
+    "relatorio_gestao_especial": (consulta_relatorio_gestao_especial, FiltrosRelatorioGestaoEspecial),
+    "plano_trabalho_especial": (consulta_plano_trabalho_especial, FiltrosPlanoTrabalhoEspecial),
+    "executor_especial": (consulta_executor_especial, FiltrosExecutorEspecial),
+    "meta_especial": (consulta_meta_especial, FiltrosMetaEspecial),
+    "finalidade_especial": (consulta_finalidade_especial, FiltrosFinalidadeEspecial),
+}
+_validators = {recurso: TypeAdapter(filtros) for recurso, (_, filtros) in RECURSOS.items()}
+_pagination_validator = TypeAdapter(Paginacao)
+
+
+def _validation_detail(error: ValidationError) -> list:
+    return [{"loc": list(item["loc"]), "msg": item["msg"], "type": item["type"]} for item in error.errors()]
+
+
+async def _run_query(consulta: ConsultaLote, semaphore: asyncio.Semaphore) -> ResultadoLote:
+    if consulta.recurso not in RECURSOS:
+        return ResultadoLote(recurso=consulta.recurso, status_code=status.HTTP_404_NOT_FOUND,
+                             detail=f"Recurso desconhecido. Disponíveis: {', '.join(RECURSOS)}")
+    endpoint, filtros_class = RECURSOS[consulta.recurso]
+    unknown = set(consulta.filtros) - {field.name for field in fields(filtros_class)}
+    if unknown:
+        return ResultadoLote(recurso=consulta.recurso, status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                             detail=f"Filtros desconhecidos: {', '.join(sorted(unknown))}")
+    try:
+        filtros = _validators[consulta.recurso].validate_python(consulta.filtros)
+        paginacao = _pagination_validator.validate_python(consulta.model_dump(include={"pagina", "tamanho_da_pagina", "cursor", "contagem", "campos"}))
+    except ValidationError as e:
+        return ResultadoLote(recurso=consulta.recurso, status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                             detail=_validation_detail(e))
+
+    from main import db
+    async with semaphore:
+        # Each sub-query takes its own pooled connection, so they run in parallel on the database
+        async with db.async_session_maker() as dbsession:
+            try:
+                resposta = await endpoint(filtros=filtros, paginacao=paginacao, dbsession=dbsession)
+            except HTTPException as e:
+                return ResultadoLote(recurso=consulta.recurso, status_code=e.status_code, detail=e.detail)
+            except Exception as e:
+                # A failing sub-query must not fail the whole batch
+                logger.error(f"Erro na consulta em lote a {consulta.recurso}: {str(e)}")
+                return ResultadoLote(recurso=consulta.recurso, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                     detail=config.ERROR_MESSAGE_INTERNAL)
+    # Cached endpoints hand back their encoded response
+    resultado = orjson.loads(resposta.body) if isinstance(resposta, Response) else resposta
+    return ResultadoLote(recurso=consulta.recurso, status_code=status.HTTP_200_OK, resultado=resultado)
+
+
+@lote_router.post("/lote",
+                  status_code=status.HTTP_200_OK,
+                  description="Executa concorrentemente uma lista de consultas paginadas a quaisquer recursos, "
+                              "cada uma com seus filtros e página. Os resultados seguem a ordem das consultas, "
+                              "cada um com o seu próprio código de status.",
+                  response_description="Resultados das consultas, na ordem informada",
+                  response_model=RespostaLote
+                  )
+async def consulta_lote(requisicao: RequisicaoLote):
+    semaphore = asyncio.Semaphore(config.BATCH_CONCURRENCY)
+    resultados = await asyncio.gather(*[_run_query(consulta, semaphore) for consulta in requisicao.consultas])
+    return RespostaLote(resultados=resultados)
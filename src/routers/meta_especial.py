@@ -1,79 +1,66 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Query
+from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select, and_, cast, Date
+from dataclasses import asdict
 from src import models
-from src.utils import get_session, get_paginated_data, config
-from src.schemas import PaginatedResponseTemplate, PaginatedMetaEspecialResponse
-from datetime import date
-from typing import Optional
-from src.cache import cache
+from src.filters import FilterEngine
+from src.utils import get_session, get_paginated_data, parse_fields, export_records, config, Paginacao, Exportacao
+from src.schemas import PaginatedResponseTemplate, PaginatedMetaEspecialResponse, FiltrosMetaEspecial
+from src.cache import cached
 
 me_router = APIRouter(tags=["Meta Especial"])
+me_filters = FilterEngine(models.MetaEspecial)
 
 
 @me_router.get("/meta_especial",
                 status_code=status.HTTP_200_OK,
                 description="Retorna uma Lista Paginada dos dados das Metas Especiais.",
                 response_description="Lista Paginada de Meta Especial",
-                response_model=PaginatedMetaEspecialResponse
+                response_model=PaginatedMetaEspecialResponse,
+                response_model_exclude_unset=True
                 )
-@cache(ttl=config.CACHE_TTL)
+@cached(ttl=config.CACHE_TTL, filters=me_filters)
 async def consulta_meta_especial(
-    id_executor: Optional[int] = Query(None, description="Identificador Único do Executor Especial"),
-    id_meta: int = Query(None, description="Identificador Único da Meta Especial"),
-    sequencial_meta: Optional[int] = Query(None, description="Sequencial da Meta Especial"),
-    nome_meta: Optional[str] = Query(None, description="Nome da Meta Especial"),
-    desc_meta: Optional[str] = Query(None, description="Descrição da Meta Especial"),
-    un_medida_meta: Optional[str] = Query(None, description="Unidade de medida da Meta Especial"),
-    qt_uniade_meta: Optional[float] = Query(None, description="Quantidade da Meta Especial", ge=0),
-    vl_custeio_emenda_especial_meta: Optional[float] = Query(None, description="Valor de custeio oriundo de emenda para Meta Especial"),
-    vl_investimento_emenda_especial_meta: Optional[float] = Query(None, description="Valor de investimento oriundo de emenda para Meta Especial"),
-    vl_custeio_recursos_proprios_meta: Optional[float] = Query(None, description="Valor de custeio oriundo de recursos próprios para Meta Especial"),
-    vl_investimento_recursos_proprios_meta: Optional[float] = Query(None, description="Valor de investimento oriundo de recursos próprios para Meta Especial"),
-    vl_custeio_rendimento_meta: Optional[float] = Query(None, description="Valor de custeio oriundo de rendimentos para Meta Especial"),
-    vl_investimento_rendimento_meta: Optional[float] = Query(None, description="Valor de investimento oriundo de rendimentos para Meta Especial"),
-    vl_custeio_doacao_meta: Optional[float] = Query(None, description="Valor de custeio oriundo de doação para Meta Especial"),
-    vl_investimento_doacao_meta: Optional[float] = Query(None, description="Valor de investimento oriundo de doação para Meta Especial"),
-    qt_meses_meta: Optional[int] = Query(None, description="Prazo de execução do Plano de Trabalho (em meses)"),
-    pagina: int = Query(1, ge=1, description="Número da Página"),
-    tamanho_da_pagina: int = Query(config.DEFAULT_PAGE_SIZE, le=config.MAX_PAGE_SIZE, ge=1, description="Tamanho da Página"),
+    filtros: FiltrosMetaEspecial = Depends(),
+    paginacao: Paginacao = Depends(),
     dbsession: AsyncSession = Depends(get_session)
 ):
-    params = locals().copy()
-    params_list = list(params.keys())[:-3]    
-    
-    if all([params[_name] is None for _name in params_list]):
+    params = me_filters.active(asdict(filtros))
+    fields = parse_fields(me_filters, paginacao.campos)
+
+    if not params and paginacao.cursor is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="Nenhum parâmetro de consulta foi informado.")
     
     try:
-        query = select(models.MetaEspecial).where(
-            and_(
-                models.MetaEspecial.id_executor == id_executor if id_executor else True,
-                models.MetaEspecial.id_meta == id_meta if id_meta else True,
-                models.MetaEspecial.sequencial_meta == sequencial_meta if sequencial_meta else True,
-                models.MetaEspecial.nome_meta.ilike(f"%{nome_meta}%") if nome_meta else True,
-                models.MetaEspecial.desc_meta.ilike(f"%{desc_meta}%") if desc_meta else True,
-                models.MetaEspecial.un_medida_meta.ilike(f"%{un_medida_meta}%") if un_medida_meta else True,
-                models.MetaEspecial.qt_uniade_meta == qt_uniade_meta if qt_uniade_meta else True,
-                models.MetaEspecial.vl_custeio_emenda_especial_meta == vl_custeio_emenda_especial_meta if vl_custeio_emenda_especial_meta else True,
-                models.MetaEspecial.vl_investimento_emenda_especial_meta == vl_investimento_emenda_especial_meta if vl_investimento_emenda_especial_meta else True,
-                models.MetaEspecial.vl_custeio_recursos_proprios_meta == vl_custeio_recursos_proprios_meta if vl_custeio_recursos_proprios_meta else True,
-                models.MetaEspecial.vl_investimento_recursos_proprios_meta == vl_investimento_recursos_proprios_meta if vl_investimento_recursos_proprios_meta else True,
-                models.MetaEspecial.vl_custeio_rendimento_meta == vl_custeio_rendimento_meta if vl_custeio_rendimento_meta else True,
-                models.MetaEspecial.vl_investimento_rendimento_meta == vl_investimento_rendimento_meta if vl_investimento_rendimento_meta else True,
-                models.MetaEspecial.vl_custeio_doacao_meta == vl_custeio_doacao_meta if vl_custeio_doacao_meta else True,
-                models.MetaEspecial.vl_investimento_doacao_meta == vl_investimento_doacao_meta if vl_investimento_doacao_meta else True,
-                models.MetaEspecial.qt_meses_meta == qt_meses_meta if qt_meses_meta else True
-            )
-        )
+        query, values = me_filters.build(params, fields)
         result = await get_paginated_data(query=query,
                                           dbsession=dbsession,
                                           response_schema=PaginatedResponseTemplate, 
-                                          current_page=pagina, 
-                                          records_per_page=tamanho_da_pagina)
+                                          current_page=paginacao.pagina, 
+                                          records_per_page=paginacao.tamanho_da_pagina,
+                                          cursor=paginacao.cursor,
+                                          count_mode=paginacao.contagem,
+                                          params=values)
         return result
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                            detail=config.ERROR_MESSAGE_INTERNAL)
\ No newline at end of file
+                            detail=config.ERROR_MESSAGE_INTERNAL)
+
+
+@me_router.get("/meta_especial/exportar",
+                status_code=status.HTTP_200_OK,
+                description="Exporta, sem paginação, os dados das Metas Especiais em NDJSON, CSV, Parquet ou Arrow. Os filtros são opcionais.",
+                response_description="Arquivo de Meta Especial",
+                response_class=StreamingResponse
+                )
+async def exporta_meta_especial(
+    filtros: FiltrosMetaEspecial = Depends(),
+    exportacao: Exportacao = Depends()
+):
+    fields = parse_fields(me_filters, exportacao.campos)
+    query, values = me_filters.build(me_filters.active(asdict(filtros)), fields)
+    return export_records(query, values, exportacao.formato, "meta_especial")
@@ -1,74 +1,89 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select, and_, cast, Date
+from dataclasses import asdict
 from src import models
-from src.utils import get_session, get_paginated_data, config
-from src.schemas import PaginatedResponseTemplate, PaginatedOrdemPagamentoOrdemBancariaEspecialResponse
-from datetime import date
-from typing import Optional
-from src.cache import cache
+from src.filters import FilterEngine
+from src.utils import get_session, get_paginated_data, parse_fields, get_tree_data, tree_tables, export_records, config, Paginacao, Exportacao
+from src.schemas import PaginatedResponseTemplate, PaginatedOrdemPagamentoOrdemBancariaEspecialResponse, FiltrosOrdemPagamentoOrdemBancariaEspecial, OrdemPagamentoOrdemBancariaEspecialArvore
+from src.cache import cached
 
 op_router = APIRouter(tags=["Ordem de pagamento e Ordem bancária Especial"])
+op_filters = FilterEngine(models.OrdemPagamentoOrdemBancariaEspecial)
 
 
 @op_router.get("/ordem_pagamento_ordem_bancaria_especial",
                 status_code=status.HTTP_200_OK,
                 description="Retorna uma Lista Paginada dos dados de Ordens de Pagamento e Ordens Bancárias Especiais.",
                 response_description="Lista Paginada de Ordens de Pagamento e Ordens Bancárias Especiais",
-                response_model=PaginatedOrdemPagamentoOrdemBancariaEspecialResponse
+                response_model=PaginatedOrdemPagamentoOrdemBancariaEspecialResponse,
+                response_model_exclude_unset=True
                 )
-@cache(ttl=config.CACHE_TTL)
+@cached(ttl=config.CACHE_TTL, filters=op_filters)
 async def consulta_ordem_pagamento_ordem_bancaria_especial(
-    id_op_ob : Optional[int] = Query(None, description="Identificador Único da Ordem de Pagamento e Ordem Bancária (OP/OB)"),
-    data_emissao_op : Optional[str] = Query(None, description="Data de Emissão da Ordem de Pagamento (OP)<br/>Ex.: 2024-12-11", pattern=r"^\d{4}-\d{2}-\d{2}$", examples=["2024-12-11"]),
-    numero_ordem_pagamento : Optional[str] = Query(None, description="Número da Ordem de Pagamento, no formato AAAAOPNNNNNN<br/>Ex.: “2020OP146800”", min_length=12, examples=["2020OP146800"]),
-    vinculacao_op : Optional[int] = Query(None, description="Código da Vinculação da Ordem de Pagamento no SIAFI (Padrão: 405)"),
-    situacao_op : Optional[int] = Query(None, description="Código da Situação da Ordem de Pagamento/Bancária"),
-    descricao_situacao_op : Optional[str] = Query(None, description="Descrição da Situação da Ordem de Pagamento/Bancária"),
-    data_situacao_op : Optional[str] = Query(None, description="Data da Situação da Ordem de Pagamento/Bancária<br/>Ex.: 2024-12-11", pattern=r"^\d{4}-\d{2}-\d{2}$", examples=["2024-12-11"]),
-    data_emissao_ob : Optional[str] = Query(None, description="Data de Emissão da Ordem Bancária (OB)<br/>Ex.: 2024-12-11", pattern=r"^\d{4}-\d{2}-\d{2}$", examples=["2024-12-11"]),
-    numero_ordem_bancaria : Optional[str] = Query(None, description="Número da Ordem Bancária, no formato AAAAOBNNNNNN<br/>Ex.: “2020OB146800”", min_length=12, examples=["2020OB146800"]),
-    numero_ordem_lancamento : Optional[str] = Query(None, description="Número da Nota de Lançamento no sistema, no formato AAAANSNNNNNN<br/>Ex.: “2020NS146800”", min_length=12, examples=["2020NS146800"]),
-    data_assinatura_ordenador_despesa_ob : Optional[str] = Query(None, description="Data da Assinatura do Ordenador de Despesa<br/>Ex.: 2024-12-11", pattern=r"^\d{4}-\d{2}-\d{2}$", examples=["2024-12-11"]),
-    data_assinatura_gestor_financeiro_ob : Optional[str] = Query(None, description="Data da Assinatura do Gestor Financeiro<br/>Ex.: 2024-12-11", pattern=r"^\d{4}-\d{2}-\d{2}$", examples=["2024-12-11"]),
-    id_dh : Optional[int] = Query(None, description="Identificador Único do Documento Hábil (DH)"),
-    pagina: int = Query(1, ge=1, description="Número da Página"),
-    tamanho_da_pagina: int = Query(config.DEFAULT_PAGE_SIZE, le=config.MAX_PAGE_SIZE, ge=1, description="Tamanho da Página"),
+    filtros: FiltrosOrdemPagamentoOrdemBancariaEspecial = Depends(),
+    paginacao: Paginacao = Depends(),
     dbsession: AsyncSession = Depends(get_session)
 ):
+    params = op_filters.active(asdict(filtros))
+    fields = parse_fields(op_filters, paginacao.campos)
 
-    params = locals().copy()
-    params_list = list(params.keys())[:-3]    
-    
-    if not any([params[_name] for _name in params_list]):
+    if not params and paginacao.cursor is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="Nenhum parâmetro de consulta foi informado.")
     
     try:
-        query = select(models.OrdemPagamentoOrdemBancariaEspecial).where(
-            and_(
-                models.OrdemPagamentoOrdemBancariaEspecial.id_op_ob == id_op_ob if id_op_ob else True,
-                models.OrdemPagamentoOrdemBancariaEspecial.data_emissao_op == date.fromisoformat(data_emissao_op) if data_emissao_op else True,
-                models.OrdemPagamentoOrdemBancariaEspecial.numero_ordem_pagamento == numero_ordem_pagamento if numero_ordem_pagamento else True,
-                models.OrdemPagamentoOrdemBancariaEspecial.vinculacao_op == vinculacao_op if vinculacao_op else True,
-                models.OrdemPagamentoOrdemBancariaEspecial.situacao_op == situacao_op if situacao_op else True,
-                models.OrdemPagamentoOrdemBancariaEspecial.descricao_situacao_op.ilike("%{descricao_situacao_op}%") if descricao_situacao_op else True,
-                models.OrdemPagamentoOrdemBancariaEspecial.data_situacao_op == date.fromisoformat(data_situacao_op) if data_situacao_op else True,
-                models.OrdemPagamentoOrdemBancariaEspecial.data_emissao_ob == date.fromisoformat(data_emissao_ob) if data_emissao_ob else True,
-                models.OrdemPagamentoOrdemBancariaEspecial.numero_ordem_bancaria == numero_ordem_bancaria if numero_ordem_bancaria else True,
-                models.OrdemPagamentoOrdemBancariaEspecial.numero_ordem_lancamento == numero_ordem_lancamento if numero_ordem_lancamento else True,
-                models.OrdemPagamentoOrdemBancariaEspecial.data_assinatura_ordenador_despesa_ob == date.fromisoformat(data_assinatura_ordenador_despesa_ob) if data_assinatura_ordenador_despesa_ob else True,
-                models.OrdemPagamentoOrdemBancariaEspecial.data_assinatura_gestor_financeiro_ob == date.fromisoformat(data_assinatura_gestor_financeiro_ob) if data_assinatura_gestor_financeiro_ob else True,
-                models.OrdemPagamentoOrdemBancariaEspecial.id_dh == id_dh if id_dh else True
-            )
-        )
+        query, values = op_filters.build(params, fields)
         result = await get_paginated_data(query=query,
                                           dbsession=dbsession,
                                           response_schema=PaginatedResponseTemplate, 
-                                          current_page=pagina, 
-                                          records_per_page=tamanho_da_pagina)
+                                          current_page=paginacao.pagina, 
+                                          records_per_page=paginacao.tamanho_da_pagina,
+                                          cursor=paginacao.cursor,
+                                          count_mode=paginacao.contagem,
+                                          params=values)
         return result
     
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                            detail=config.ERROR_MESSAGE_INTERNAL)
+
+
+@op_router.get("/ordem_pagamento_ordem_bancaria_especial/exportar",
+                status_code=status.HTTP_200_OK,
+                description="Exporta, sem paginação, os dados de Ordens de Pagamento e Ordens Bancárias Especiais em NDJSON, CSV, Parquet ou Arrow. Os filtros são opcionais.",
+                response_description="Arquivo de Ordens de Pagamento e Ordens Bancárias Especiais",
+                response_class=StreamingResponse
+                )
+async def exporta_ordem_pagamento_ordem_bancaria_especial(
+    filtros: FiltrosOrdemPagamentoOrdemBancariaEspecial = Depends(),
+    exportacao: Exportacao = Depends()
+):
+    fields = parse_fields(op_filters, exportacao.campos)
+    query, values = op_filters.build(op_filters.active(asdict(filtros)), fields)
+    return export_records(query, values, exportacao.formato, "ordem_pagamento_ordem_bancaria_especial")
+
+
+@op_router.get("/ordem_pagamento_ordem_bancaria_especial/{id_op_ob}/arvore",
+                status_code=status.HTTP_200_OK,
+                description="Retorna a Ordem de Pagamento e Ordem Bancária Especial informado com os registros dependentes aninhados, até a profundidade indicada em 'expandir'.",
+                response_description="Ordem de Pagamento e Ordem Bancária Especial com os registros dependentes",
+                response_model=OrdemPagamentoOrdemBancariaEspecialArvore
+                )
+@cached(ttl=config.CACHE_TTL, tables=tree_tables(models.OrdemPagamentoOrdemBancariaEspecial))
+async def arvore_ordem_pagamento_ordem_bancaria_especial(
+    id_op_ob: int,
+    expandir: int = Query(1, ge=0, le=config.MAX_EXPAND_DEPTH, description=config.EXPAND_DESCRIPTION),
+    dbsession: AsyncSession = Depends(get_session)
+):
+    try:
+        result = await get_tree_data(models.OrdemPagamentoOrdemBancariaEspecial, id_op_ob, expandir, dbsession)
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                             detail=config.ERROR_MESSAGE_INTERNAL)
+    if result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=config.ERROR_MESSAGE_NOT_FOUND)
+    return result
@@ -1,15 +1,15 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select, and_, cast, Date
+from dataclasses import asdict
 from src import models
-from src.utils import get_session, get_paginated_data, config
-from src.schemas import PaginatedResponseTemplate, PaginatedProgramaEspecialResponse
-from datetime import date
-from typing import Optional
-from src.cache import cache
-
+from src.filters import FilterEngine
+from src.utils import get_session, get_paginated_data, parse_fields, get_tree_data, tree_tables, export_records, config, Paginacao, Exportacao
+from src.schemas import PaginatedResponseTemplate, PaginatedProgramaEspecialResponse, FiltrosProgramaEspecial, ProgramaEspecialArvore
+from src.cache import cached
 
 prg_router = APIRouter(tags=["Programa Especial"])
+prg_filters = FilterEngine(models.ProgramaEspecial)
 
 
 
@@ -17,78 +17,74 @@ prg_router = APIRouter(tags=["Programa Especial"])
                 status_code=status.HTTP_200_OK,
                 description="Retorna uma Lista Paginada dos dados de Programas Especiais.",
                 response_description="Lista Paginada de Programa Especial",
-                response_model=PaginatedProgramaEspecialResponse
+                response_model=PaginatedProgramaEspecialResponse,
+                response_model_exclude_unset=True
                 )
-@cache(ttl=config.CACHE_TTL)
+@cached(ttl=config.CACHE_TTL, filters=prg_filters)
 async def consulta_programa_especial(
-    id_programa: Optional[int] = Query(None, description="Identificador Único do Programa"),
-    ano_programa: Optional[int] = Query(None, description="Ano do Programa"),
-    modalidade_programa: Optional[str] = Query(None, description="Modalidade do Programa"),
-    codigo_programa: Optional[str] = Query(None, description="Código do Programa"),
-    id_orgao_superior_programa: Optional[int] = Query(None, description="Código SIORG do Órgão Repassador do Programa"),
-    sigla_orgao_superior_programa: Optional[str] = Query(None, description="Sigla do Órgão Repassador do Programa"),
-    nome_orgao_superior_programa: Optional[str] = Query(None, description="Nome do Órgão Repassador do Programa"),
-    id_orgao_programa: Optional[int] = Query(None, description="Código do Programa"),
-    sigla_orgao_programa: Optional[str] = Query(None, description="Sigla do Órgão do Programa"),
-    nome_orgao_programa: Optional[str] = Query(None, description="Nome do Órgão do Programa"),
-    id_unidade_gestora_programa: Optional[int] = Query(None, description="Código da Unidade Gestora do Órgão do Programa"),
-    documentos_origem_programa: Optional[str] = Query(None, 
-                                                      description="Concatenação dos Códigos Únicos para Identificação dos Dados Financeiros Disponibilizados",
-                                                      pattern=r"^\d{4}[A-Z]{2}\d{5}.*$"),
-    id_unidade_orcamentaria_responsavel_programa: Optional[int] = Query(None, description="Identificador Único da Unidade Orçamentária Responsável pelo Programa"),
-    data_inicio_ciencia_programa: Optional[str] = Query(None, description="Data de Início para o Registro de Ciência"),
-    data_fim_ciencia_programa: Optional[str] = Query(None, description="Data Final para o Registro de Ciência"),
-    valor_necessidade_financeira_programa: Optional[float] = Query(None, description="Valor da Necessidade Financeira do Programa, resultado do somatório das minutas de empenho"),
-    valor_total_disponibilizado_programa: Optional[float] = Query(None, description="Valor Total Disponibilizado para o Programa"),
-    valor_impedido_programa: Optional[float] = Query(None, description="Valor Impedido"),
-    valor_a_disponibilizar_programa: Optional[float] = Query(None, description="Valor a ser Disponibilizado"),
-    valor_documentos_habeis_gerados_programa: Optional[float] = Query(None, description="Valor dos Documentos Hábeis Gerados"),
-    valor_obs_geradas_programa: Optional[float] = Query(None, description="Valor das Ordens Bancárias Geradas"),
-    valor_disponibilidade_atual_programa: Optional[float] = Query(None, description="Valor do Saldo Disponível para o registro atual de disponibilização"),
-    pagina: int = Query(1, ge=1, description="Número da Página"),
-    tamanho_da_pagina: int = Query(config.DEFAULT_PAGE_SIZE, le=config.MAX_PAGE_SIZE, ge=1, description="Tamanho da Página"),
+    filtros: FiltrosProgramaEspecial = Depends(),
+    paginacao: Paginacao = Depends(),
     dbsession: AsyncSession = Depends(get_session)
 ):
-    params_list = [id_programa, ano_programa, modalidade_programa, codigo_programa, id_orgao_superior_programa, sigla_orgao_superior_programa, nome_orgao_superior_programa, id_orgao_programa, sigla_orgao_programa, nome_orgao_programa, id_unidade_gestora_programa, documentos_origem_programa, id_unidade_orcamentaria_responsavel_programa,
-                   data_inicio_ciencia_programa, data_fim_ciencia_programa, valor_necessidade_financeira_programa, valor_total_disponibilizado_programa, valor_impedido_programa, valor_a_disponibilizar_programa, valor_documentos_habeis_gerados_programa, valor_obs_geradas_programa, valor_disponibilidade_atual_programa]
-    if not any(params_list):
+    params = prg_filters.active(asdict(filtros))
+    fields = parse_fields(prg_filters, paginacao.campos)
+
+    if not params and paginacao.cursor is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="Nenhum parâmetro de consulta foi informado.")
-
+    
     try:
-        query = select(models.ProgramaEspecial).where(
-            and_(
-                models.ProgramaEspecial.id_programa == id_programa if id_programa else True,
-                models.ProgramaEspecial.ano_programa == ano_programa if ano_programa else True,
-                models.ProgramaEspecial.modalidade_programa.ilike(f"%{modalidade_programa}%") if modalidade_programa else True,
-                models.ProgramaEspecial.codigo_programa == codigo_programa if codigo_programa else True,
-                models.ProgramaEspecial.id_orgao_superior_programa == id_orgao_superior_programa if id_orgao_superior_programa else True,
-                models.ProgramaEspecial.sigla_orgao_superior_programa.ilike(f"%{sigla_orgao_superior_programa}%") if sigla_orgao_superior_programa else True,
-                models.ProgramaEspecial.nome_orgao_superior_programa.ilike(f"%{nome_orgao_superior_programa}%") if nome_orgao_superior_programa else True,
-                models.ProgramaEspecial.id_orgao_programa == id_orgao_programa if id_orgao_programa else True,
-                models.ProgramaEspecial.sigla_orgao_programa.ilike(f"%{sigla_orgao_programa}%") if sigla_orgao_programa else True,
-                models.ProgramaEspecial.nome_orgao_programa.ilike(f"%{nome_orgao_programa}%") if nome_orgao_programa else True,
-                models.ProgramaEspecial.id_unidade_gestora_programa == id_unidade_gestora_programa if id_unidade_gestora_programa else True,
-                models.ProgramaEspecial.documentos_origem_programa.ilike(f"%{documentos_origem_programa}%") if documentos_origem_programa else True,
-                models.ProgramaEspecial.id_unidade_orcamentaria_responsavel_programa == id_unidade_orcamentaria_responsavel_programa if id_unidade_orcamentaria_responsavel_programa else True,
-                models.ProgramaEspecial.data_inicio_ciencia_programa == data_inicio_ciencia_programa if data_inicio_ciencia_programa else True,
-                models.ProgramaEspecial.data_fim_ciencia_programa == data_fim_ciencia_programa if data_fim_ciencia_programa else True,
-                models.ProgramaEspecial.valor_necessidade_financeira_programa == valor_necessidade_financeira_programa if valor_necessidade_financeira_programa else True,
-                models.ProgramaEspecial.valor_total_disponibilizado_programa == valor_total_disponibilizado_programa if valor_total_disponibilizado_programa else True,
-                models.ProgramaEspecial.valor_impedido_programa == valor_impedido_programa if valor_impedido_programa else True,
-                models.ProgramaEspecial.valor_a_disponibilizar_programa == valor_a_disponibilizar_programa if valor_a_disponibilizar_programa else True,
-                models.ProgramaEspecial.valor_documentos_habeis_gerados_programa == valor_documentos_habeis_gerados_programa if valor_documentos_habeis_gerados_programa else True,
-                models.ProgramaEspecial.valor_obs_geradas_programa == valor_obs_geradas_programa if valor_obs_geradas_programa else True,
-                models.ProgramaEspecial.valor_disponibilidade_atual_programa == valor_disponibilidade_atual_programa if valor_disponibilidade_atual_programa else True
-            )
-        )
+        query, values = prg_filters.build(params, fields)
         result = await get_paginated_data(query=query,
                                           dbsession=dbsession,
                                           response_schema=PaginatedResponseTemplate, 
-                                          current_page=pagina, 
-                                          records_per_page=tamanho_da_pagina)
+                                          current_page=paginacao.pagina, 
+                                          records_per_page=paginacao.tamanho_da_pagina,
+                                          cursor=paginacao.cursor,
+                                          count_mode=paginacao.contagem,
+                                          params=values)
         return result
     
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                            detail=config.ERROR_MESSAGE_INTERNAL)
+
+
+@prg_router.get("/programa_especial/exportar",
+                status_code=status.HTTP_200_OK,
+                description="Exporta, sem paginação, os dados de Programas Especiais em NDJSON, CSV, Parquet ou Arrow. Os filtros são opcionais.",
+                response_description="Arquivo de Programa Especial",
+                response_class=StreamingResponse
+                )
+async def exporta_programa_especial(
+    filtros: FiltrosProgramaEspecial = Depends(),
+    exportacao: Exportacao = Depends()
+):
+    fields = parse_fields(prg_filters, exportacao.campos)
+    query, values = prg_filters.build(prg_filters.active(asdict(filtros)), fields)
+    return export_records(query, values, exportacao.formato, "programa_especial")
+
+
+@prg_router.get("/programa_especial/{id_programa}/arvore",
+                status_code=status.HTTP_200_OK,
+                description="Retorna o Programa Especial informado com os registros dependentes aninhados, até a profundidade indicada em 'expandir'.",
+                response_description="Programa Especial com os registros dependentes",
+                response_model=ProgramaEspecialArvore
+                )
+@cached(ttl=config.CACHE_TTL, tables=tree_tables(models.ProgramaEspecial))
+async def arvore_programa_especial(
+    id_programa: int,
+    expandir: int = Query(1, ge=0, le=config.MAX_EXPAND_DEPTH, description=config.EXPAND_DESCRIPTION),
+    dbsession: AsyncSession = Depends(get_session)
+):
+    try:
+        result = await get_tree_data(models.ProgramaEspecial, id_programa, expandir, dbsession)
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                             detail=config.ERROR_MESSAGE_INTERNAL)
+    if result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=config.ERROR_MESSAGE_NOT_FOUND)
+    return result
@@ -1,56 +1,66 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Query
+from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select, and_, cast, Date
+from dataclasses import asdict
 from src import models
-from src.utils import get_session, get_paginated_data, config
-from src.schemas import PaginatedResponseTemplate, PaginatedRelatorioGestaoEspecialResponse
-from datetime import date
-from typing import Optional
-from src.cache import cache
+from src.filters import FilterEngine
+from src.utils import get_session, get_paginated_data, parse_fields, export_records, config, Paginacao, Exportacao
+from src.schemas import PaginatedResponseTemplate, PaginatedRelatorioGestaoEspecialResponse, FiltrosRelatorioGestaoEspecial
+from src.cache import cached
 
 rg_router = APIRouter(tags=["Relatório de Gestão Especial"])
+rg_filters = FilterEngine(models.RelatorioGestaoEspecial)
 
 
 @rg_router.get("/relatorio_gestao_especial",
                 status_code=status.HTTP_200_OK,
                 description="Retorna uma Lista Paginada de dados de Relatórios de Gestão Especial.",
                 response_description="Lista Paginada com dados de Relatórios de Gestão Especial",
-                response_model=PaginatedRelatorioGestaoEspecialResponse
+                response_model=PaginatedRelatorioGestaoEspecialResponse,
+                response_model_exclude_unset=True
                 )
-@cache(ttl=config.CACHE_TTL)
+@cached(ttl=config.CACHE_TTL, filters=rg_filters)
 async def consulta_relatorio_gestao_especial(
-    id_relatorio_gestao : Optional[int] = Query(None, description="Identificador Único do Relatório de Gestão"),
-    situacao_relatorio_gestao : Optional[str] = Query(None, description="Situação do Relatório de Gestão"),
-    parecer_relatorio_gestao : Optional[str] = Query(None, description="Parecer do Relatório de Gestão"),
-    id_plano_acao : Optional[int] = Query(None, description="Identificador Único do Plano de Ação (PA)"),
-    pagina: int = Query(1, ge=1, description="Número da Página"),
-    tamanho_da_pagina: int = Query(config.DEFAULT_PAGE_SIZE, le=config.MAX_PAGE_SIZE, ge=1, description="Tamanho da Página"),
+    filtros: FiltrosRelatorioGestaoEspecial = Depends(),
+    paginacao: Paginacao = Depends(),
     dbsession: AsyncSession = Depends(get_session)
 ):
+    params = rg_filters.active(asdict(filtros))
+    fields = parse_fields(rg_filters, paginacao.campos)
 
-    params = locals().copy()
-    params_list = list(params.keys())[:-3]    
-    
-    if not any([params[_name] for _name in params_list]):
+    if not params and paginacao.cursor is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="Nenhum parâmetro de consulta foi informado.")
     
     try:
-        query = select(models.RelatorioGestaoEspecial).where(
-            and_(
-                models.RelatorioGestaoEspecial.id_relatorio_gestao == id_relatorio_gestao if id_relatorio_gestao else True,
-                models.RelatorioGestaoEspecial.situacao_relatorio_gestao.ilike(f"%{situacao_relatorio_gestao}%") if situacao_relatorio_gestao else True,
-                models.RelatorioGestaoEspecial.parecer_relatorio_gestao.ilike(f"%{parecer_relatorio_gestao}%") if parecer_relatorio_gestao else True,
-                models.RelatorioGestaoEspecial.id_plano_acao == id_plano_acao if id_plano_acao else True
-            )
-        )
+        query, values = rg_filters.build(params, fields)
         result = await get_paginated_data(query=query,
                                           dbsession=dbsession,
                                           response_schema=PaginatedResponseTemplate, 
-                                          current_page=pagina, 
-                                          records_per_page=tamanho_da_pagina)
+                                          current_page=paginacao.pagina, 
+                                          records_per_page=paginacao.tamanho_da_pagina,
+                                          cursor=paginacao.cursor,
+                                          count_mode=paginacao.contagem,
+                                          params=values)
         return result
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                            detail=config.ERROR_MESSAGE_INTERNAL)
\ No newline at end of file
+                            detail=config.ERROR_MESSAGE_INTERNAL)
+
+
+@rg_router.get("/relatorio_gestao_especial/exportar",
+                status_code=status.HTTP_200_OK,
+                description="Exporta, sem paginação, os dados de Relatórios de Gestão Especial em NDJSON, CSV, Parquet ou Arrow. Os filtros são opcionais.",
+                response_description="Arquivo com dados de Relatórios de Gestão Especial",
+                response_class=StreamingResponse
+                )
+async def exporta_relatorio_gestao_especial(
+    filtros: FiltrosRelatorioGestaoEspecial = Depends(),
+    exportacao: Exportacao = Depends()
+):
+    fields = parse_fields(rg_filters, exportacao.campos)
+    query, values = rg_filters.build(rg_filters.active(asdict(filtros)), fields)
+    return export_records(query, values, exportacao.formato, "relatorio_gestao_especial")
@@ -1,45 +1,77 @@
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field
 from fastapi import Query
-from typing import List, Optional, Any
+from typing import Annotated, Dict, List, Optional, Any, Literal
+from dataclasses import dataclass
+from enum import Enum
 import datetime as dt
+from appconfig import Settings
+
+config = Settings()
+
+
+def _upper_case(value):
+    return value.upper() if isinstance(value, str) else value
+
+
+# Sigla de UF, gravada em maiusculas: aceita tambem minusculas
+SiglaUF = Annotated[str, BeforeValidator(_upper_case)]
+
+
+# Estrategias de contagem do total de registros
+class ModoContagem(str, Enum):
+    exata = "exata"
+    estimada = "estimada"
+    cache = "cache"
+    nenhuma = "nenhuma"
+
+
+# Formatos de exportacao em lote
+class FormatoExportacao(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+    parquet = "parquet"
+    arrow = "arrow"
+
 
 # Template para paginacao
 class PaginatedResponseTemplate(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     
     data: List[Any]
-    total_pages: int
-    total_items: int
+    total_pages: Optional[int]
+    total_items: Optional[int]
     page_number: int
     page_size: int
+    proximo_cursor: Optional[str] = None
+    contagem: ModoContagem = ModoContagem.exata
 # --------------------------------------
 
 
 class ProgramaEspecialResponse(BaseModel):  
     model_config = ConfigDict(from_attributes=True, arbitrary_types_allowed=True, extra="forbid") 
 
-    id_programa: Optional[int]
-    ano_programa: Optional[int]
-    modalidade_programa: Optional[str]
-    codigo_programa: Optional[str]
-    id_orgao_superior_programa: Optional[int]
-    sigla_orgao_superior_programa: Optional[str]
-    nome_orgao_superior_programa: Optional[str]
-    id_orgao_programa: Optional[int]
-    sigla_orgao_programa: Optional[str]
-    nome_orgao_programa: Optional[str]
-    id_unidade_gestora_programa: Optional[int]
-    documentos_origem_programa: Optional[str]
-    id_unidade_orcamentaria_responsavel_programa: Optional[int]
-    data_inicio_ciencia_programa: Optional[dt.date]
-    data_fim_ciencia_programa: Optional[dt.date]
-    valor_necessidade_financeira_programa: Optional[float]
-    valor_total_disponibilizado_programa: Optional[float]
-    valor_impedido_programa: Optional[float]
-    valor_a_disponibilizar_programa: Optional[float]
-    valor_documentos_habeis_gerados_programa: Optional[float]
-    valor_obs_geradas_programa: Optional[float]
-    valor_disponibilidade_atual_programa: Optional[float]
+    id_programa: Optional[int] = None
+    ano_programa: Optional[int] = None
+    modalidade_programa: Optional[str] = None
+    codigo_programa: Optional[str] = None
+    id_orgao_superior_programa: Optional[int] = None
+    sigla_orgao_superior_programa: Optional[str] = None
+    nome_orgao_superior_programa: Optional[str] = None
+    id_orgao_programa: Optional[int] = None
+    sigla_orgao_programa: Optional[str] = None
+    nome_orgao_programa: Optional[str] = None
+    id_unidade_gestora_programa: Optional[int] = None
+    documentos_origem_programa: Optional[str] = None
+    id_unidade_orcamentaria_responsavel_programa: Optional[int] = None
+    data_inicio_ciencia_programa: Optional[dt.date] = None
+    data_fim_ciencia_programa: Optional[dt.date] = None
+    valor_necessidade_financeira_programa: Optional[float] = None
+    valor_total_disponibilizado_programa: Optional[float] = None
+    valor_impedido_programa: Optional[float] = None
+    valor_a_disponibilizar_programa: Optional[float] = None
+    valor_documentos_habeis_gerados_programa: Optional[float] = None
+    valor_obs_geradas_programa: Optional[float] = None
+    valor_disponibilidade_atual_programa: Optional[float] = None
 
 
 class PaginatedProgramaEspecialResponse(PaginatedResponseTemplate):
@@ -51,32 +83,32 @@ class PlanoAcaoEspecialResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True, extra="forbid") 
 
     id_plano_acao: int
-    codigo_plano_acao: Optional[str]
-    ano_plano_acao: Optional[int]
-    modalidade_plano_acao: Optional[str]
-    situacao_plano_acao: Optional[str]
-    cnpj_beneficiario_plano_acao: Optional[str]
-    nome_beneficiario_plano_acao: Optional[str]
-    uf_beneficiario_plano_acao: Optional[str]
-    codigo_banco_plano_acao: Optional[str]
-    codigo_situacao_dado_bancario_plano_acao: Optional[int]
-    nome_banco_plano_acao: Optional[str]
-    numero_agencia_plano_acao: Optional[int]
-    dv_agencia_plano_acao: Optional[str]
-    numero_conta_plano_acao: Optional[int]
-    dv_conta_plano_acao: Optional[str]
-    nome_parlamentar_emenda_plano_acao: Optional[str]
-    ano_emenda_parlamentar_plano_acao: Optional[str]
-    codigo_parlamentar_emenda_plano_acao: Optional[str]
-    sequencial_emenda_parlamentar_plano_acao: Optional[int]
-    numero_emenda_parlamentar_plano_acao: Optional[str]
-    codigo_emenda_parlamentar_formatado_plano_acao: Optional[str]
-    codigo_descricao_areas_politicas_publicas_plano_acao: Optional[str]
-    descricao_programacao_orcamentaria_plano_acao: Optional[str]
-    motivo_impedimento_plano_acao: Optional[str]
-    valor_custeio_plano_acao: Optional[float]
-    valor_investimento_plano_acao: Optional[float]
-    id_programa: Optional[int]
+    codigo_plano_acao: Optional[str] = None
+    ano_plano_acao: Optional[int] = None
+    modalidade_plano_acao: Optional[str] = None
+    situacao_plano_acao: Optional[str] = None
+    cnpj_beneficiario_plano_acao: Optional[str] = None
+    nome_beneficiario_plano_acao: Optional[str] = None
+    uf_beneficiario_plano_acao: Optional[str] = None
+    codigo_banco_plano_acao: Optional[str] = None
+    codigo_situacao_dado_bancario_plano_acao: Optional[int] = None
+    nome_banco_plano_acao: Optional[str] = None
+    numero_agencia_plano_acao: Optional[int] = None
+    dv_agencia_plano_acao: Optional[str] = None
+    numero_conta_plano_acao: Optional[int] = None
+    dv_conta_plano_acao: Optional[str] = None
+    nome_parlamentar_emenda_plano_acao: Optional[str] = None
+    ano_emenda_parlamentar_plano_acao: Optional[str] = None
+    codigo_parlamentar_emenda_plano_acao: Optional[str] = None
+    sequencial_emenda_parlamentar_plano_acao: Optional[int] = None
+    numero_emenda_parlamentar_plano_acao: Optional[str] = None
+    codigo_emenda_parlamentar_formatado_plano_acao: Optional[str] = None
+    codigo_descricao_areas_politicas_publicas_plano_acao: Optional[str] = None
+    descricao_programacao_orcamentaria_plano_acao: Optional[str] = None
+    motivo_impedimento_plano_acao: Optional[str] = None
+    valor_custeio_plano_acao: Optional[float] = None
+    valor_investimento_plano_acao: Optional[float] = None
+    id_programa: Optional[int] = None
 
 
 class PaginatedPlanoAcaoEspecialResponse(PaginatedResponseTemplate):
@@ -87,32 +119,32 @@ class EmpenhoEspecialResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True, arbitrary_types_allowed=True, extra="forbid")
 
     id_empenho: int
-    id_minuta_empenho: Optional[str]
-    numero_empenho: Optional[str]
-    situacao_empenho: Optional[int]
-    descricao_situacao_empenho: Optional[str]
-    tipo_documento_empenho: Optional[int]
-    descricao_tipo_documento_empenho: Optional[str]
-    status_processamento_empenho: Optional[str]
-    ug_responsavel_empenho: Optional[int]
-    ug_emitente_empenho: Optional[int]
-    descricao_ug_emitente_empenho: Optional[str]
-    fonte_recurso_empenho: Optional[str]
-    plano_interno_empenho: Optional[str]
-    ptres_empenho: Optional[int]
-    grupo_natureza_despesa_empenho: Optional[str]
-    natureza_despesa_empenho: Optional[str]
-    subitem_empenho: Optional[str]
-    categoria_despesa_empenho: Optional[str]
-    modalidade_despesa_empenho: Optional[int]
-    cnpj_beneficiario_empenho: Optional[str]
-    nome_beneficiario_empenho: Optional[str]
-    uf_beneficiario_empenho: Optional[str]
-    numero_ro_empenho: Optional[str]
-    data_emissao_empenho: Optional[dt.date]
-    prioridade_desbloqueio_empenho: Optional[int]
-    valor_empenho: Optional[float]
-    id_plano_acao: Optional[int]
+    id_minuta_empenho: Optional[str] = None
+    numero_empenho: Optional[str] = None
+    situacao_empenho: Optional[int] = None
+    descricao_situacao_empenho: Optional[str] = None
+    tipo_documento_empenho: Optional[int] = None
+    descricao_tipo_documento_empenho: Optional[str] = None
+    status_processamento_empenho: Optional[str] = None
+    ug_responsavel_empenho: Optional[int] = None
+    ug_emitente_empenho: Optional[int] = None
+    descricao_ug_emitente_empenho: Optional[str] = None
+    fonte_recurso_empenho: Optional[str] = None
+    plano_interno_empenho: Optional[str] = None
+    ptres_empenho: Optional[int] = None
+    grupo_natureza_despesa_empenho: Optional[str] = None
+    natureza_despesa_empenho: Optional[str] = None
+    subitem_empenho: Optional[str] = None
+    categoria_despesa_empenho: Optional[str] = None
+    modalidade_despesa_empenho: Optional[int] = None
+    cnpj_beneficiario_empenho: Optional[str] = None
+    nome_beneficiario_empenho: Optional[str] = None
+    uf_beneficiario_empenho: Optional[str] = None
+    numero_ro_empenho: Optional[str] = None
+    data_emissao_empenho: Optional[dt.date] = None
+    prioridade_desbloqueio_empenho: Optional[int] = None
+    valor_empenho: Optional[float] = None
+    id_plano_acao: Optional[int] = None
 
 
 class PaginatedEmpenhoEspecialResponse(PaginatedResponseTemplate):
@@ -123,28 +155,28 @@ class DocumentoHabilEspecialResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True, arbitrary_types_allowed=True, extra="forbid") 
 
     id_dh: int
-    id_minuta_documento_habil: Optional[str]
-    numero_documento_habil: Optional[str]
-    situacao_dh: Optional[int]
-    descricao_situacao_dh: Optional[str]
-    tipo_documento_dh: Optional[str]
-    ug_emitente_dh: Optional[int]
-    descricao_ug_emitente_dh: Optional[str]
-    data_vencimento_dh: Optional[dt.date]
-    data_emissao_dh: Optional[dt.date]
-    ug_pagadora_dh: Optional[int]
-    descricao_ug_pagadora_dh: Optional[str]
-    variacao_patrimonial_diminuta_dh: Optional[str]
-    passivo_transferencia_constitucional_legal_dh: Optional[str]
-    centro_custo_empenho: Optional[str]
-    codigo_siorg_empenho: Optional[int]
-    mes_referencia_empenho: Optional[str]
-    ano_referencia_empenho: Optional[int]
-    ug_beneficiada_dh: Optional[int]
-    descricao_ug_beneficiada_dh: Optional[str]
-    valor_dh: Optional[float]
-    valor_rateio_dh: Optional[float]
-    id_empenho: Optional[int]
+    id_minuta_documento_habil: Optional[str] = None
+    numero_documento_habil: Optional[str] = None
+    situacao_dh: Optional[int] = None
+    descricao_situacao_dh: Optional[str] = None
+    tipo_documento_dh: Optional[str] = None
+    ug_emitente_dh: Optional[int] = None
+    descricao_ug_emitente_dh: Optional[str] = None
+    data_vencimento_dh: Optional[dt.date] = None
+    data_emissao_dh: Optional[dt.date] = None
+    ug_pagadora_dh: Optional[int] = None
+    descricao_ug_pagadora_dh: Optional[str] = None
+    variacao_patrimonial_diminuta_dh: Optional[str] = None
+    passivo_transferencia_constitucional_legal_dh: Optional[str] = None
+    centro_custo_empenho: Optional[str] = None
+    codigo_siorg_empenho: Optional[int] = None
+    mes_referencia_empenho: Optional[str] = None
+    ano_referencia_empenho: Optional[int] = None
+    ug_beneficiada_dh: Optional[int] = None
+    descricao_ug_beneficiada_dh: Optional[str] = None
+    valor_dh: Optional[float] = None
+    valor_rateio_dh: Optional[float] = None
+    id_empenho: Optional[int] = None
 
 
 class PaginatedDocumentoHabilEspecialResponse(PaginatedResponseTemplate):
@@ -154,19 +186,19 @@ class PaginatedDocumentoHabilEspecialResponse(PaginatedResponseTemplate):
 class OrdemPagamentoOrdemBancariaEspecialResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True, arbitrary_types_allowed=True, extra="forbid") 
 
-    id_op_ob : int
-    data_emissao_op : Optional[dt.date]
-    numero_ordem_pagamento : Optional[str]
-    vinculacao_op : Optional[int]
-    situacao_op : Optional[int]
-    descricao_situacao_op : Optional[str]
-    data_situacao_op : Optional[dt.date]
-    data_emissao_ob : Optional[dt.date]
-    numero_ordem_bancaria : Optional[str]
-    numero_ordem_lancamento : Optional[str]
-    data_assinatura_ordenador_despesa_ob : Optional[dt.date]
-    data_assinatura_gestor_financeiro_ob : Optional[dt.date]
-    id_dh : Optional[int]
+    id_op_ob: int
+    data_emissao_op: Optional[dt.date] = None
+    numero_ordem_pagamento: Optional[str] = None
+    vinculacao_op: Optional[int] = None
+    situacao_op: Optional[int] = None
+    descricao_situacao_op: Optional[str] = None
+    data_situacao_op: Optional[dt.date] = None
+    data_emissao_ob: Optional[dt.date] = None
+    numero_ordem_bancaria: Optional[str] = None
+    numero_ordem_lancamento: Optional[str] = None
+    data_assinatura_ordenador_despesa_ob: Optional[dt.date] = None
+    data_assinatura_gestor_financeiro_ob: Optional[dt.date] = None
+    id_dh: Optional[int] = None
 
 
 class PaginatedOrdemPagamentoOrdemBancariaEspecialResponse(PaginatedResponseTemplate):
@@ -177,10 +209,10 @@ class HistoricoPagamentoEspecialResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True, arbitrary_types_allowed=True, extra="forbid") 
 
     id_historico_op_ob: int
-    data_hora_historico_op: Optional[dt.datetime]
-    historico_situacao_op: Optional[int]
-    descricao_historico_situacao_op: Optional[str]
-    id_op_ob: Optional[int]
+    data_hora_historico_op: Optional[dt.datetime] = None
+    historico_situacao_op: Optional[int] = None
+    descricao_historico_situacao_op: Optional[str] = None
+    id_op_ob: Optional[int] = None
 
 
 class PaginatedHistoricoPagamentoEspecialResponse(PaginatedResponseTemplate):    
@@ -191,9 +223,9 @@ class RelatorioGestaoEspecialResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True, arbitrary_types_allowed=True, extra="forbid") 
 
     id_relatorio_gestao: int
-    situacao_relatorio_gestao: Optional[str]    
-    parecer_relatorio_gestao: Optional[str]
-    id_plano_acao: Optional[int]
+    situacao_relatorio_gestao: Optional[str] = None
+    parecer_relatorio_gestao: Optional[str] = None
+    id_plano_acao: Optional[int] = None
 
 
 class PaginatedRelatorioGestaoEspecialResponse(PaginatedResponseTemplate):
@@ -204,16 +236,16 @@ class PlanoTrabalhoEspecialResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True, arbitrary_types_allowed=True, extra="forbid") 
 
     id_plano_trabalho: int
-    situacao_plano_trabalho: Optional[str]
-    ind_orcamento_proprio_plano_trabalho: Optional[str]
-    data_inicio_execucao_plano_trabalho: Optional[dt.datetime]
-    data_fim_execucao_plano_trabalho: Optional[dt.datetime]
-    prazo_execucao_meses_plano_trabalho: Optional[int]
-    id_plano_acao: Optional[int]
-    classificacao_orcamentaria_pt: Optional[str]
-    ind_justificativa_prorrogacao_atraso_pt: Optional[bool]
-    ind_justificativa_prorrogacao_paralizacao_pt: Optional[bool]
-    justificativa_prorrogacao_pt: Optional[str]
+    situacao_plano_trabalho: Optional[str] = None
+    ind_orcamento_proprio_plano_trabalho: Optional[str] = None
+    data_inicio_execucao_plano_trabalho: Optional[dt.datetime] = None
+    data_fim_execucao_plano_trabalho: Optional[dt.datetime] = None
+    prazo_execucao_meses_plano_trabalho: Optional[int] = None
+    id_plano_acao: Optional[int] = None
+    classificacao_orcamentaria_pt: Optional[str] = None
+    ind_justificativa_prorrogacao_atraso_pt: Optional[bool] = None
+    ind_justificativa_prorrogacao_paralizacao_pt: Optional[bool] = None
+    justificativa_prorrogacao_pt: Optional[str] = None
 
 
 class PaginatedPlanoTrabalhoEspecialResponse(PaginatedResponseTemplate):
@@ -223,13 +255,13 @@ class PaginatedPlanoTrabalhoEspecialResponse(PaginatedResponseTemplate):
 class ExecutorEspecialResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True, arbitrary_types_allowed=True, extra="forbid")
 
-    id_plano_acao: Optional[int]
+    id_plano_acao: Optional[int] = None
     id_executor: int
-    cnpj_executor: Optional[str]
-    nome_executor: Optional[str]
-    objeto_executor: Optional[str]
-    vl_custeio_executor: Optional[float]
-    vl_investimento_executor: Optional[float]
+    cnpj_executor: Optional[str] = None
+    nome_executor: Optional[str] = None
+    objeto_executor: Optional[str] = None
+    vl_custeio_executor: Optional[float] = None
+    vl_investimento_executor: Optional[float] = None
 
 
 class PaginatedExecutorEspecialResponse(PaginatedResponseTemplate):
@@ -239,22 +271,22 @@ class PaginatedExecutorEspecialResponse(PaginatedResponseTemplate):
 class MetaEspecialResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True, arbitrary_types_allowed=True, extra="forbid")
 
-    id_executor: Optional[int]
+    id_executor: Optional[int] = None
     id_meta: int
-    sequencial_meta: Optional[int]
-    nome_meta: Optional[str]
-    desc_meta: Optional[str]
-    un_medida_meta: Optional[str]
-    qt_uniade_meta: Optional[float]
-    vl_custeio_emenda_especial_meta: Optional[float]
-    vl_investimento_emenda_especial_meta: Optional[float]
-    vl_custeio_recursos_proprios_meta: Optional[float]
-    vl_investimento_recursos_proprios_meta: Optional[float]
-    vl_custeio_rendimento_meta: Optional[float]
-    vl_investimento_rendimento_meta: Optional[float]
-    vl_custeio_doacao_meta: Optional[float]
-    vl_investimento_doacao_meta: Optional[float]
-    qt_meses_meta: Optional[int]
+    sequencial_meta: Optional[int] = None
+    nome_meta: Optional[str] = None
+    desc_meta: Optional[str] = None
+    un_medida_meta: Optional[str] = None
+    qt_uniade_meta: Optional[float] = None
+    vl_custeio_emenda_especial_meta: Optional[float] = None
+    vl_investimento_emenda_especial_meta: Optional[float] = None
+    vl_custeio_recursos_proprios_meta: Optional[float] = None
+    vl_investimento_recursos_proprios_meta: Optional[float] = None
+    vl_custeio_rendimento_meta: Optional[float] = None
+    vl_investimento_rendimento_meta: Optional[float] = None
+    vl_custeio_doacao_meta: Optional[float] = None
+    vl_investimento_doacao_meta: Optional[float] = None
+    qt_meses_meta: Optional[int] = None
 
 
 class PaginatedMetaEspecialResponse(PaginatedResponseTemplate):
@@ -265,11 +297,341 @@ class FinalidadeEspecialResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True, arbitrary_types_allowed=True, extra="forbid")
 
     id_executor: int
-    cd_area_politica_publica_tipo_pt: Optional[int]
-    area_politica_publica_tipo_pt: Optional[str]
-    cd_area_politica_publica_pt: Optional[int]
-    area_politica_publica_pt: Optional[str]
+    cd_area_politica_publica_tipo_pt: Optional[int] = None
+    area_politica_publica_tipo_pt: Optional[str] = None
+    cd_area_politica_publica_pt: Optional[int] = None
+    area_politica_publica_pt: Optional[str] = None
 
 
 class PaginatedFinalidadeEspecialResponse(PaginatedResponseTemplate):
-    data: List[FinalidadeEspecialResponse]   
\ No newline at end of file
+    data: List[FinalidadeEspecialResponse]
+
+
+# --------------------------------------
+# Arvores da expansao hierarquica: cada registro traz os dependentes aninhados,
+# com as listas nulas nos niveis alem da profundidade solicitada em 'expandir'
+class OrdemPagamentoOrdemBancariaEspecialArvore(OrdemPagamentoOrdemBancariaEspecialResponse):
+    historicos_pagamento: Optional[List[HistoricoPagamentoEspecialResponse]] = None
+
+
+class DocumentoHabilEspecialArvore(DocumentoHabilEspecialResponse):
+    ordens_pagamento: Optional[List[OrdemPagamentoOrdemBancariaEspecialArvore]] = None
+
+
+class EmpenhoEspecialArvore(EmpenhoEspecialResponse):
+    documentos_habeis: Optional[List[DocumentoHabilEspecialArvore]] = None
+
+
+class ExecutorEspecialArvore(ExecutorEspecialResponse):
+    metas: Optional[List[MetaEspecialResponse]] = None
+    finalidades: Optional[List[FinalidadeEspecialResponse]] = None
+
+
+class PlanoAcaoEspecialArvore(PlanoAcaoEspecialResponse):
+    empenhos: Optional[List[EmpenhoEspecialArvore]] = None
+    executores: Optional[List[ExecutorEspecialArvore]] = None
+    relatorios_gestao: Optional[List[RelatorioGestaoEspecialResponse]] = None
+    planos_trabalho: Optional[List[PlanoTrabalhoEspecialResponse]] = None
+
+
+class ProgramaEspecialArvore(ProgramaEspecialResponse):
+    planos_acao: Optional[List[PlanoAcaoEspecialArvore]] = None
+
+
+# --------------------------------------
+# Consulta em lote: varias consultas paginadas, a recursos quaisquer, em uma so requisicao
+class ConsultaLote(BaseModel):
+    recurso: str = Field(description="Nome do recurso, como no caminho do endpoint. Ex.: empenho_especial")
+    filtros: Dict[str, Any] = Field(default_factory=dict, description="Filtros do recurso, com os mesmos nomes dos parâmetros do endpoint")
+    pagina: int = Field(1, ge=1, description="Número da Página")
+    tamanho_da_pagina: int = Field(config.DEFAULT_PAGE_SIZE, ge=1, le=config.MAX_PAGE_SIZE, description="Tamanho da Página")
+    cursor: Optional[str] = Field(None, description=config.CURSOR_DESCRIPTION)
+    contagem: ModoContagem = Field(ModoContagem.exata, description=config.COUNT_DESCRIPTION)
+    campos: Optional[List[str]] = Field(None, description=config.FIELDS_DESCRIPTION)
+
+
+class RequisicaoLote(BaseModel):
+    consultas: List[ConsultaLote] = Field(min_length=1, max_length=config.MAX_BATCH_QUERIES)
+
+
+class ResultadoLote(BaseModel):
+    recurso: str
+    status_code: int
+    resultado: Optional[PaginatedResponseTemplate] = None
+    detail: Optional[Any] = None
+
+
+class RespostaLote(BaseModel):
+    resultados: List[ResultadoLote]
+
+
+# --------------------------------------
+# Agregados: totais pre-calculados em visoes materializadas (ver src/aggregates.py)
+class DimensaoEmpenhoUfAno(str, Enum):
+    uf_beneficiario_empenho = "uf_beneficiario_empenho"
+    ano_emissao_empenho = "ano_emissao_empenho"
+    id_programa = "id_programa"
+
+
+class DimensaoPlanoAcaoParlamentar(str, Enum):
+    codigo_parlamentar_emenda_plano_acao = "codigo_parlamentar_emenda_plano_acao"
+    nome_parlamentar_emenda_plano_acao = "nome_parlamentar_emenda_plano_acao"
+    ano_plano_acao = "ano_plano_acao"
+    uf_beneficiario_plano_acao = "uf_beneficiario_plano_acao"
+
+
+class DimensaoPagamentoPrograma(str, Enum):
+    id_programa = "id_programa"
+    codigo_programa = "codigo_programa"
+    ano_programa = "ano_programa"
+
+
+class AgregadoResponse(BaseModel):
+    agregado: str
+    agrupado_por: List[str]
+    data: List[Dict[str, Any]]
+
+
+# --------------------------------------
+# Sufixo da descricao dos filtros que aceitam uma lista de valores
+MULTI_VALUE_DESCRIPTION = (f"<br/>Aceita múltiplos valores (até {config.MAX_FILTER_VALUES}), "
+                           "repetindo o parâmetro: ?param=1&param=2")
+
+# Filtros de consulta, injetados nos endpoints como dependências.
+# Cada campo corresponde a uma coluna do modelo; o operador aplicado vem de src/filters.py
+
+
+@dataclass
+class FiltrosProgramaEspecial:
+    id_programa: Optional[List[int]] = Query(None, description="Identificador Único do Programa" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    ano_programa: Optional[int] = Query(None, description="Ano do Programa")
+    modalidade_programa: Optional[str] = Query(None, description="Modalidade do Programa")
+    codigo_programa: Optional[List[str]] = Query(None, description="Código do Programa" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    id_orgao_superior_programa: Optional[List[int]] = Query(None, description="Código SIORG do Órgão Repassador do Programa" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    sigla_orgao_superior_programa: Optional[str] = Query(None, description="Sigla do Órgão Repassador do Programa")
+    nome_orgao_superior_programa: Optional[str] = Query(None, description="Nome do Órgão Repassador do Programa")
+    id_orgao_programa: Optional[List[int]] = Query(None, description="Código do Programa" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    sigla_orgao_programa: Optional[str] = Query(None, description="Sigla do Órgão do Programa")
+    nome_orgao_programa: Optional[str] = Query(None, description="Nome do Órgão do Programa")
+    id_unidade_gestora_programa: Optional[List[int]] = Query(None, description="Código da Unidade Gestora do Órgão do Programa" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    documentos_origem_programa: Optional[str] = Query(None, 
+                                                      description="Concatenação dos Códigos Únicos para Identificação dos Dados Financeiros Disponibilizados",
+                                                      pattern=r"^\d{4}[A-Z]{2}\d{5}.*$")
+    id_unidade_orcamentaria_responsavel_programa: Optional[List[int]] = Query(None, description="Identificador Único da Unidade Orçamentária Responsável pelo Programa" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    data_inicio_ciencia_programa: Optional[str] = Query(None, description="Data de Início para o Registro de Ciência", pattern=r"^\d{4}-\d{2}-\d{2}$")
+    data_fim_ciencia_programa: Optional[str] = Query(None, description="Data Final para o Registro de Ciência", pattern=r"^\d{4}-\d{2}-\d{2}$")
+    valor_necessidade_financeira_programa: Optional[float] = Query(None, description="Valor da Necessidade Financeira do Programa, resultado do somatório das minutas de empenho")
+    valor_total_disponibilizado_programa: Optional[float] = Query(None, description="Valor Total Disponibilizado para o Programa")
+    valor_impedido_programa: Optional[float] = Query(None, description="Valor Impedido")
+    valor_a_disponibilizar_programa: Optional[float] = Query(None, description="Valor a ser Disponibilizado")
+    valor_documentos_habeis_gerados_programa: Optional[float] = Query(None, description="Valor dos Documentos Hábeis Gerados")
+    valor_obs_geradas_programa: Optional[float] = Query(None, description="Valor das Ordens Bancárias Geradas")
+    valor_disponibilidade_atual_programa: Optional[float] = Query(None, description="Valor do Saldo Disponível para o registro atual de disponibilização")
+
+
+@dataclass
+class FiltrosPlanoAcaoEspecial:
+    id_plano_acao: Optional[List[int]] = Query(None, description="Identificador Único do Plano de Ação (PA)" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    codigo_plano_acao: Optional[List[str]] = Query(None, description="Código do Programa concatenado com o ID do Plano de Ação" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    ano_plano_acao: Optional[int] = Query(None, description="Ano de Criação do Plano de Ação")
+    modalidade_plano_acao: Optional[str] = Query(None, description="Modalidade de Transferência do Plano de Ação")
+    situacao_plano_acao: Optional[str] = Query(None, description="Situação do Plano de Ação")
+    cnpj_beneficiario_plano_acao: Optional[List[str]] = Query(None, description="CNPJ – Cadastro Nacional de Pessoa Jurídica do Beneficiário do Plano de Ação" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    nome_beneficiario_plano_acao: Optional[str] = Query(None, description="Nome do Beneficiário do Plano de Ação")
+    uf_beneficiario_plano_acao: Optional[SiglaUF] = Query(None, description="Sigla da Unidade de Federação (ex.: DF)", pattern=r"^[A-Z]{2}$")
+    codigo_banco_plano_acao: Optional[str] = Query(None, description="Código do Banco do PA")
+    codigo_situacao_dado_bancario_plano_acao: Optional[int] = Query(None, description="Código da Situação da Conta Corrente do PA")
+    nome_banco_plano_acao: Optional[str] = Query(None, description="Nome do Banco do PA")
+    numero_agencia_plano_acao: Optional[int] = Query(None, description="Número da Agência Bancária da Conta Corrente do PA")
+    dv_agencia_plano_acao: Optional[str] = Query(None, description="Dígito Verificador da Agência Bancária da Conta Corrente do PA")
+    numero_conta_plano_acao: Optional[int] = Query(None, description="Número da Conta Corrente do PA")
+    dv_conta_plano_acao: Optional[str] = Query(None, description="Dígito Verificador da Conta Corrente do PA")
+    nome_parlamentar_emenda_plano_acao: Optional[str] = Query(None, description="Nome do Parlamentar Autor da Emenda")
+    ano_emenda_parlamentar_plano_acao: Optional[str] = Query(None, description="Ano da Emenda Parlamentar")
+    codigo_parlamentar_emenda_plano_acao: Optional[List[str]] = Query(None, description="Código do Parlamentar Autor da Emenda" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    sequencial_emenda_parlamentar_plano_acao: Optional[int] = Query(None, description="Sequencial da Emenda Por Parlamentar no Ano")
+    numero_emenda_parlamentar_plano_acao: Optional[List[str]] = Query(None, description="Concatenação do Ano, Código e Sequencial do Parlamentar" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    codigo_emenda_parlamentar_formatado_plano_acao: Optional[List[str]] = Query(None, description="Código Formatado da Emenda Parlamentar" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    codigo_descricao_areas_politicas_publicas_plano_acao: Optional[str] = Query(None, description="Concatenação dos Códigos e Descrições dos Tipos da \
+                                                                                Áreas das Políticas Públicas com os Códigos e Descrições das Áreas das Políticas Públicas")
+    descricao_programacao_orcamentaria_plano_acao: Optional[str] = Query(None, description="Concatenação das Programações Orçamentárias constantes da \
+                                                                         Lei Orçamentária do ente beneficiado na qual o recurso será apropriado")
+    motivo_impedimento_plano_acao: Optional[str] = Query(None, description="Motivo do Impedimento do Plano de Ação")
+    valor_custeio_plano_acao: Optional[float] = Query(None, description="Valor Consolidado de Custeio das Emendas Parlamentares do Plano de Ação")
+    valor_investimento_plano_acao: Optional[float] = Query(None, description="Valor Consolidado de Investimento das Emendas Parlamentares do Plano de Ação")
+    id_programa: Optional[List[int]] = Query(None, description="Identificador Único do Programa" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+
+
+@dataclass
+class FiltrosEmpenhoEspecial:
+    id_empenho: Optional[List[int]] = Query(None, description="Identificador Único da Nota de Empenho (NE)" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    id_minuta_empenho: Optional[List[str]] = Query(None, description="Número da Minuta gerado para Nota de Empenho, utiliza o Número Interno e Ano de Emissão" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    numero_empenho: Optional[List[str]] = Query(None, description="Número da Nota de Empenho gerada e enviada pelo SIAFI (Sistema Integrado de Administração Financeira)" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    situacao_empenho: Optional[int] = Query(None, description="Situação da Nota de Empenho (NE)")
+    descricao_situacao_empenho: Optional[str] = Query(None, description="Descrição da Situação da Nota de Empenho (NE)")
+    tipo_documento_empenho: Optional[int] = Query(None, description="Tipo da Nota de Empenho")
+    descricao_tipo_documento_empenho: Optional[str] = Query(None, description="Descrição do Tipo da Nota de Empenho")
+    status_processamento_empenho: Optional[str] = Query(None, description="Indica o status do processamento em lote da Nota de Empenho")
+    ug_responsavel_empenho: Optional[int] = Query(None, description="Código da Unidade Gestora Responsável da Nota de Empenho")
+    ug_emitente_empenho: Optional[int] = Query(None, description="Código da Unidade Gestora Emitente da Nota de Empenho")
+    descricao_ug_emitente_empenho: Optional[str] = Query(None, description="Nome da Unidade Gestora Emitente da Nota de Empenho")
+    fonte_recurso_empenho: Optional[str] = Query(None, description="Fonte de Recurso da Nota de Empenho no SIAFI (Sistema Integrado de Administração Financeira)")
+    plano_interno_empenho: Optional[str] = Query(None, description="Instrumento de planejamento e de acompanhamento da ação planejada, usado como forma de detalhamento desta, \
+                                                 de uso exclusivo de cada Ministério/órgão, com as seguintes características: - Há um atributo na tabela de órgão para indicar \
+                                                 se o órgão utiliza ou não o Plano Interno (PI). Este atributo é mantido pela STN decorrente da solicitação do órgão. \
+                                                 - A unidade setorial de orçamento do órgão é responsável por registrar na tabela os códigos de PI. \
+                                                 - O SIAFI (Sistema Integrado de Administração Financeira), de acordo com o cadastramento previsto acima, só aceitará a emissão de \
+                                                 nota de empenho com o código de PI existente. - Os códigos de PI poderão ter até 11 (onze) posições alfa-numéricas")
+    ptres_empenho: Optional[int] = Query(None, description="Número do Programa de Trabalho Resumido")
+    grupo_natureza_despesa_empenho: Optional[str] = Query(None, description="Primeiro dígito do Código da Natureza de Despesa no SIAFI")
+    natureza_despesa_empenho: Optional[str] = Query(None, description="Código da Natureza de Despesa no SIAFI (Sistema Integrado de Administração Financeira)")
+    subitem_empenho: Optional[str] = Query(None, description="Código do Subitem da Natureza de Despesa no SIAFI (Sistema Integrado de Administração Financeira)")
+    categoria_despesa_empenho: Optional[str] = Query(None, description="Código da Categoria de Despesa associada à Nota de Empenho")
+    modalidade_despesa_empenho: Optional[int] = Query(None, description="Código da Modalidade de Despesa")
+    cnpj_beneficiario_empenho: Optional[List[str]] = Query(None, description="CNPJ do Beneficiário" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    nome_beneficiario_empenho: Optional[str] = Query(None, description="Nome do Beneficiário")
+    uf_beneficiario_empenho: Optional[SiglaUF] = Query(None, description="Sigla da Unidade da Federação do Beneficiário (ex.: DF)", pattern=r"^[A-Z]{2}$")
+    numero_ro_empenho: Optional[str] = Query(None, description="Número da lista gerado e enviado pelo SIAFI (Sistema Integrado de Administração Financeira)")
+    data_emissao_empenho: Optional[str] = Query(None, description="Data de envio ao SIAFI (Sistema Integrado de Administração Financeira)", pattern=r"^\d{4}-\d{2}-\d{2}$")
+    prioridade_desbloqueio_empenho: Optional[int] = Query(None, description="Indicador de prioridade no desbloqueio de recursos")
+    valor_empenho: Optional[float] = Query(None, description="Valor total da Nota de Empenho")
+    id_plano_acao: Optional[List[int]] = Query(None, description="Identificador Único do Plano de Ação (PA)" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+
+
+@dataclass
+class FiltrosDocumentoHabilEspecial:
+    id_dh: Optional[List[int]] = Query(None, description="Identificador Único do Documento Hábil (DH)" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    id_minuta_documento_habil: Optional[List[str]] = Query(None, description="Padrao de Minuta de DH do tipo 2020MDH000001" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    numero_documento_habil: Optional[List[Annotated[str, Field(max_length=12)]]] = Query(None, description="Número do DH no formato: YYYYTTNNNNNN<br/>Ex.: 2024TF010020" + MULTI_VALUE_DESCRIPTION, examples=[["2024TF010020"]], max_length=config.MAX_FILTER_VALUES)
+    situacao_dh: Optional[int] = Query(None, description="Código da Situação do DH")
+    descricao_situacao_dh: Optional[str] = Query(None, description="Descrição da Situação do DH")
+    tipo_documento_dh: Optional[str] = Query(None, description="Código do tipo do Documento Hábil")
+    ug_emitente_dh: Optional[int] = Query(None, description="Código da Unidade Gestora Emitente do Documento Hábil")
+    descricao_ug_emitente_dh: Optional[str] = Query(None, description="Nome da Unidade Gestora Emitente do Documento Hábil")
+    data_vencimento_dh: Optional[str] = Query(None, description="Data de Vencimento do Documento Hábil<br/>Ex.: 2024-12-11", pattern=r"^\d{4}-\d{2}-\d{2}$", examples=["2024-12-11"])
+    data_emissao_dh: Optional[str] = Query(None, description="Data de Emissão do Documento Hábil<br/>Ex.: 2024-12-11", pattern=r"^\d{4}-\d{2}-\d{2}$", examples=["2024-12-11"])
+    ug_pagadora_dh: Optional[int] = Query(None, description="Código da Unidade Gestora Pagadora do Documento Hábil")
+    descricao_ug_pagadora_dh: Optional[str] = Query(None, description="Nome da Unidade Gestora Pagadora do Documento Hábil")
+    variacao_patrimonial_diminuta_dh: Optional[str] = Query(None, description="Variação Patrimonial Diminutiva")
+    passivo_transferencia_constitucional_legal_dh: Optional[str] = Query(None, description="Passivo Transferência Legal ou Constitucional")
+    centro_custo_empenho: Optional[str] = Query(None, description="Código do Centro de Custo")
+    codigo_siorg_empenho: Optional[int] = Query(None, description="Código SIORG do Centro de Custo")
+    mes_referencia_empenho: Optional[str] = Query(None, description="Mês de Referência do Centro do Custo", min_length=2, max_length=2)
+    ano_referencia_empenho: Optional[int] = Query(None, description="Ano de Referência do Centro do Custo")
+    ug_beneficiada_dh: Optional[int] = Query(None, description="Código da Unidade Gestora Beneficiada do Documento Hábil")
+    descricao_ug_beneficiada_dh: Optional[str] = Query(None, description="Nome da Unidade Gestora Beneficiada do Documento Hábil")
+    valor_dh: Optional[float] = Query(None, description="Valor do Documento Hábil.<br/>OBS: Se a Disponibilidade Financeira for menor que o valor do Empenho, mais de um Documento Hábil pode ser criado")
+    valor_rateio_dh: Optional[float] = Query(None, description="Valor do Rateio")
+    id_empenho: Optional[List[int]] = Query(None, description="Identificador Único da Nota de Empenho (NE)" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+
+
+@dataclass
+class FiltrosOrdemPagamentoOrdemBancariaEspecial:
+    id_op_ob: Optional[List[int]] = Query(None, description="Identificador Único da Ordem de Pagamento e Ordem Bancária (OP/OB)" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    data_emissao_op: Optional[str] = Query(None, description="Data de Emissão da Ordem de Pagamento (OP)<br/>Ex.: 2024-12-11", pattern=r"^\d{4}-\d{2}-\d{2}$", examples=["2024-12-11"])
+    numero_ordem_pagamento: Optional[List[Annotated[str, Field(min_length=12)]]] = Query(None, description="Número da Ordem de Pagamento, no formato AAAAOPNNNNNN<br/>Ex.: “2020OP146800”" + MULTI_VALUE_DESCRIPTION, examples=[["2020OP146800"]], max_length=config.MAX_FILTER_VALUES)
+    vinculacao_op: Optional[int] = Query(None, description="Código da Vinculação da Ordem de Pagamento no SIAFI (Padrão: 405)")
+    situacao_op: Optional[int] = Query(None, description="Código da Situação da Ordem de Pagamento/Bancária")
+    descricao_situacao_op: Optional[str] = Query(None, description="Descrição da Situação da Ordem de Pagamento/Bancária")
+    data_situacao_op: Optional[str] = Query(None, description="Data da Situação da Ordem de Pagamento/Bancária<br/>Ex.: 2024-12-11", pattern=r"^\d{4}-\d{2}-\d{2}$", examples=["2024-12-11"])
+    data_emissao_ob: Optional[str] = Query(None, description="Data de Emissão da Ordem Bancária (OB)<br/>Ex.: 2024-12-11", pattern=r"^\d{4}-\d{2}-\d{2}$", examples=["2024-12-11"])
+    numero_ordem_bancaria: Optional[List[Annotated[str, Field(min_length=12)]]] = Query(None, description="Número da Ordem Bancária, no formato AAAAOBNNNNNN<br/>Ex.: “2020OB146800”" + MULTI_VALUE_DESCRIPTION, examples=[["2020OB146800"]], max_length=config.MAX_FILTER_VALUES)
+    numero_ordem_lancamento: Optional[List[Annotated[str, Field(min_length=12)]]] = Query(None, description="Número da Nota de Lançamento no sistema, no formato AAAANSNNNNNN<br/>Ex.: “2020NS146800”" + MULTI_VALUE_DESCRIPTION, examples=[["2020NS146800"]], max_length=config.MAX_FILTER_VALUES)
+    data_assinatura_ordenador_despesa_ob: Optional[str] = Query(None, description="Data da Assinatura do Ordenador de Despesa<br/>Ex.: 2024-12-11", pattern=r"^\d{4}-\d{2}-\d{2}$", examples=["2024-12-11"])
+    data_assinatura_gestor_financeiro_ob: Optional[str] = Query(None, description="Data da Assinatura do Gestor Financeiro<br/>Ex.: 2024-12-11", pattern=r"^\d{4}-\d{2}-\d{2}$", examples=["2024-12-11"])
+    id_dh: Optional[List[int]] = Query(None, description="Identificador Único do Documento Hábil (DH)" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+
+
+@dataclass
+class FiltrosHistoricoPagamentoEspecial:
+    id_historico_op_ob: Optional[List[int]] = Query(None, description="Identificador Único do Histórico de Pagamento" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    data_hora_historico_op: Optional[str] = Query(None, description="Data do Histórico de Pagamento<br/>Ex.: 2024-12-11", pattern=r"^\d{4}-\d{2}-\d{2}$", examples=["2024-12-11"])
+    historico_situacao_op: Optional[int] = Query(None, description="Código da Situação da Ordem de Pagamento/Bancária")
+    descricao_historico_situacao_op: Optional[str] = Query(None, description="Descrição da Situação da Ordem de Pagamento/Bancária")
+    id_op_ob: Optional[List[int]] = Query(None, description="Identificador Único da Ordem de Pagamento e Ordem Bancária (OP/OB)" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+
+
+@dataclass
+class FiltrosRelatorioGestaoEspecial:
+    id_relatorio_gestao: Optional[List[int]] = Query(None, description="Identificador Único do Relatório de Gestão" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    situacao_relatorio_gestao: Optional[str] = Query(None, description="Situação do Relatório de Gestão")
+    parecer_relatorio_gestao: Optional[str] = Query(None, description="Parecer do Relatório de Gestão")
+    id_plano_acao: Optional[List[int]] = Query(None, description="Identificador Único do Plano de Ação (PA)" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+
+
+@dataclass
+class FiltrosPlanoTrabalhoEspecial:
+    id_plano_trabalho: Optional[List[int]] = Query(None, description="Identificador Único do Plano de Trabalho" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    situacao_plano_trabalho: Optional[str] = Query(None, description="Situação do Plano de Trabalho")
+    ind_orcamento_proprio_plano_trabalho: Literal["Sim", "Não"] = Query(None, description="Indicador de Orçamento Próprio (Sim|Não)")
+    data_inicio_execucao_plano_trabalho: Optional[str] = Query(None, description="Data de início da execução do Plano de Trabalho")
+    data_fim_execucao_plano_trabalho: Optional[str] = Query(None, description="Data de encerramento do Plano de Trabalho")
+    prazo_execucao_meses_plano_trabalho: Optional[int] = Query(None, description="Prazo de execução do Plano de Trabalho (em meses)")
+    id_plano_acao: Optional[List[int]] = Query(None, description="Identificador Único do Plano de Ação correspondente" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    classificacao_orcamentaria_pt: Optional[str] = Query(None, description="Classificação Orçamentária do Plano de Trabalho")
+    ind_justificativa_prorrogacao_atraso_pt: Optional[bool] = Query(None, description="Indicador de Atraso no Plano de Trabalho")
+    ind_justificativa_prorrogacao_paralizacao_pt: Optional[bool] = Query(None, description="Indicador de Paralização no Plano de Trabalho")
+    justificativa_prorrogacao_pt: Optional[str] = Query(None, description="Identificador Único do Plano de Trabalho")
+
+
+@dataclass
+class FiltrosExecutorEspecial:
+    id_executor: Optional[List[int]] = Query(None, description="Identificador Único do Executor Especial" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    id_plano_acao: Optional[List[int]] = Query(None, description="Identificador Único do Plano de Ação correspondente" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    cnpj_executor: Optional[List[str]] = Query(None, description="CNPJ do Executor Especial" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    nome_executor: Optional[str] = Query(None, description="Nome do Executor Especial")
+    objeto_executor: Optional[str] = Query(None, description="Objeto do Executor Especial")
+    vl_custeio_executor: Optional[float] = Query(None, description="Valor de Custeio do Executor Especial", ge=0)
+    vl_investimento_executor: Optional[float] = Query(None, description="Valor de Investimento do Executor Especial", ge=0)
+
+
+@dataclass
+class FiltrosMetaEspecial:
+    id_executor: Optional[List[int]] = Query(None, description="Identificador Único do Executor Especial" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    id_meta: Optional[List[int]] = Query(None, description="Identificador Único da Meta Especial" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    sequencial_meta: Optional[int] = Query(None, description="Sequencial da Meta Especial")
+    nome_meta: Optional[str] = Query(None, description="Nome da Meta Especial")
+    desc_meta: Optional[str] = Query(None, description="Descrição da Meta Especial")
+    un_medida_meta: Optional[str] = Query(None, description="Unidade de medida da Meta Especial")
+    qt_uniade_meta: Optional[float] = Query(None, description="Quantidade da Meta Especial", ge=0)
+    vl_custeio_emenda_especial_meta: Optional[float] = Query(None, description="Valor de custeio oriundo de emenda para Meta Especial")
+    vl_investimento_emenda_especial_meta: Optional[float] = Query(None, description="Valor de investimento oriundo de emenda para Meta Especial")
+    vl_custeio_recursos_proprios_meta: Optional[float] = Query(None, description="Valor de custeio oriundo de recursos próprios para Meta Especial")
+    vl_investimento_recursos_proprios_meta: Optional[float] = Query(None, description="Valor de investimento oriundo de recursos próprios para Meta Especial")
+    vl_custeio_rendimento_meta: Optional[float] = Query(None, description="Valor de custeio oriundo de rendimentos para Meta Especial")
+    vl_investimento_rendimento_meta: Optional[float] = Query(None, description="Valor de investimento oriundo de rendimentos para Meta Especial")
+    vl_custeio_doacao_meta: Optional[float] = Query(None, description="Valor de custeio oriundo de doação para Meta Especial")
+    vl_investimento_doacao_meta: Optional[float] = Query(None, description="Valor de investimento oriundo de doação para Meta Especial")
+    qt_meses_meta: Optional[int] = Query(None, description="Prazo de execução do Plano de Trabalho (em meses)")
+
+
+@dataclass
+class FiltrosFinalidadeEspecial:
+    id_executor: Optional[List[int]] = Query(None, description="Identificador Único do Executor Especial" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    cd_area_politica_publica_tipo_pt: Optional[List[int]] = Query(None, description="Código do tipo de política pública da Finalidade Plano de Trabalho Especial" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    area_politica_publica_tipo_pt: Optional[str] = Query(None, description="Descrição do tipo de política pública da Finalidade do Plano de Trabalho Especial")
+    cd_area_politica_publica_pt: Optional[List[int]] = Query(None, description="Código da área da política pública da Finalidade do Plano de Trabalho Especial" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    area_politica_publica_pt: Optional[str] = Query(None, description="Descrição da área da política pública da Finalidade do Plano de Trabalho Especial")
+
+
+# Filtros dos agregados, aplicados sobre as dimensoes das visoes materializadas
+@dataclass
+class FiltrosAgregadoEmpenhoUfAno:
+    uf_beneficiario_empenho: Optional[List[SiglaUF]] = Query(None, description="Sigla da Unidade da Federação do Beneficiário" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    ano_emissao_empenho: Optional[List[int]] = Query(None, description="Ano de emissão da Nota de Empenho" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    id_programa: Optional[List[int]] = Query(None, description="Identificador Único do Programa" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+
+
+@dataclass
+class FiltrosAgregadoPlanoAcaoParlamentar:
+    codigo_parlamentar_emenda_plano_acao: Optional[List[str]] = Query(None, description="Código do Parlamentar Autor da Emenda" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    nome_parlamentar_emenda_plano_acao: Optional[List[str]] = Query(None, description="Nome do Parlamentar Autor da Emenda" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    ano_plano_acao: Optional[List[int]] = Query(None, description="Ano de Criação do Plano de Ação" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    uf_beneficiario_plano_acao: Optional[List[SiglaUF]] = Query(None, description="Sigla da Unidade da Federação do Beneficiário" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+
+
+@dataclass
+class FiltrosAgregadoPagamentoPrograma:
+    id_programa: Optional[List[int]] = Query(None, description="Identificador Único do Programa" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    codigo_programa: Optional[List[str]] = Query(None, description="Código do Programa" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
+    ano_programa: Optional[List[int]] = Query(None, description="Ano do Programa" + MULTI_VALUE_DESCRIPTION, max_length=config.MAX_FILTER_VALUES)
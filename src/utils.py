@@ -1,15 +1,52 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import AsyncGenerator
-from sqlmodel import select, func
+from sqlalchemy import Column, Integer, any_, bindparam, inspect as sa_inspect
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import ONETOMANY
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from sqlalchemy.sql.visitors import InternalTraversal
+from sqlalchemy.util import LRUCache
+from typing import AsyncGenerator, List, Optional, Tuple
+from dataclasses import dataclass
+from sqlmodel import select, func, tuple_, text
 from math import ceil
 import asyncio
+import base64
+import binascii
+import csv
+import io
+import logging
+import hashlib
+import orjson
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 import secrets
 from appconfig import Settings
+from src.schemas import ModoContagem, FormatoExportacao
+from src.cache import cache
+from src.columnar import COLUMNAR_FORMATS, encode_columnar
+from src.filters import FilterEngine
+from src.versions import data_versions
 
 security_stats = HTTPBasic()
 config = Settings()
+logger = logging.getLogger(__name__)
+# Cursor value that starts a keyset pagination from the first page
+CURSOR_START = "inicio"
+# Label of the window count column added to the page query
+WINDOW_COUNT_LABEL = "_total_items"
+# Count and page statements derived from the most recently used base queries
+_derived_statements = LRUCache(2048)
+# Record and children statements of the tree endpoints, per key column
+_tree_statements = {}
+# Content type of each export format
+EXPORT_MEDIA_TYPES = {
+    FormatoExportacao.ndjson: "application/x-ndjson",
+    FormatoExportacao.csv: "text/csv; charset=utf-8",
+    FormatoExportacao.parquet: "application/vnd.apache.parquet",
+    FormatoExportacao.arrow: "application/vnd.apache.arrow.stream",
+}
 
 # Dependency to inject db sessions
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
@@ -18,36 +55,359 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
-async def get_paginated_data(query: select, dbsession: AsyncSession, response_schema, current_page: int = 1, records_per_page: int = 10):
-    # Prepare the query for execution
-    query.execution_options(prepared=True)
-    # Calculate the offset based on the current page and records per page
-    offset = (current_page - 1) * records_per_page
+@dataclass
+class Paginacao:
+    """
+    Pagination parameters shared by every paginated endpoint
+    """
+    pagina: int = Query(1, ge=1, description="Número da Página")
+    tamanho_da_pagina: int = Query(config.DEFAULT_PAGE_SIZE, le=config.MAX_PAGE_SIZE, ge=1, description="Tamanho da Página")
+    cursor: Optional[str] = Query(None, description=config.CURSOR_DESCRIPTION)
+    contagem: ModoContagem = Query(ModoContagem.exata, description=config.COUNT_DESCRIPTION)
+    campos: Optional[List[str]] = Query(None, description=config.FIELDS_DESCRIPTION)
 
-    # Query total number of records
-    count_query = select(func.count()).select_from(query.subquery())
-    total_records = await dbsession.scalar(count_query)
 
-    # Calculate the last page number
-    last_page = ceil(total_records / records_per_page)
+@dataclass
+class Exportacao:
+    """
+    Parameters shared by every export endpoint
+    """
+    formato: FormatoExportacao = Query(FormatoExportacao.ndjson, description=config.EXPORT_FORMAT_DESCRIPTION)
+    campos: Optional[List[str]] = Query(None, description=config.FIELDS_DESCRIPTION)
+
+
+def parse_fields(filter_engine: FilterEngine, campos: Optional[List[str]]) -> Tuple[str, ...]:
+    """
+    Validates the fields requested in 'campos' (repeated or comma-separated) against the
+    columns of the endpoint's model. An empty tuple means all of them
+    """
+    fields = tuple(name.strip() for value in campos or [] for name in value.split(",") if name.strip())
+    invalid = filter_engine.invalid_fields(fields)
+    if invalid:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail=f"{config.ERROR_MESSAGE_INVALID_FIELDS} {', '.join(invalid)}. "
+                                   f"Disponíveis: {', '.join(filter_engine.operators)}")
+    return fields
+
+
+def encode_cursor(key_values: list) -> str:
+    """
+    Encodes the key values of the last row of a page into an opaque cursor token
+    """
+    return base64.urlsafe_b64encode(orjson.dumps(key_values)).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, key_size: int) -> Optional[list]:
+    """
+    Decodes a cursor token back into key values. Returns None for the first page
+    """
+    if cursor == CURSOR_START:
+        return None
+    try:
+        key_values = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        key_values = None
+    if not isinstance(key_values, list) or len(key_values) != key_size \
+            or not all(isinstance(value, int) for value in key_values):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=config.ERROR_MESSAGE_INVALID_CURSOR)
+    return key_values
+
+
+class Explain(Executable, ClauseElement):
+    """
+    EXPLAIN (FORMAT JSON) of a statement, run with the statement's bound parameters
+    """
+    inherit_cache = True
+    _traverse_internals = [("statement", InternalTraversal.dp_clauseelement)]
+
+    def __init__(self, statement: select):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler, **kw) -> str:
+    return f"EXPLAIN (FORMAT JSON) {compiler.process(element.statement, **kw)}"
+
+
+def derive_statement(query: select, kind: str) -> select:
+    """
+    Returns the count, page or export statement derived from a base query. Offset, limit and
+    cursor values are bound parameters, so each statement is built once per base query and reused
+    """
+    statements = _derived_statements.get(query)
+    if statements is None:
+        statements = _derived_statements[query] = {}
+    if kind in statements:
+        return statements[kind]
+
+    limit = bindparam("_limit", type_=Integer)
+    if kind == "count":
+        statement = select(func.count()).select_from(query.subquery())
+    elif kind in ("page", "page_window"):
+        statement = query.offset(bindparam("_offset", type_=Integer)).limit(limit)
+        if kind == "page_window":
+            statement = statement.add_columns(func.count().over().label(WINDOW_COUNT_LABEL))
+    else:
+        key_columns = list(query.get_final_froms()[0].primary_key.columns)
+        statement = query
+        if kind == "keyset":
+            positions = [bindparam(f"_cursor_{i}", type_=column.type) for i, column in enumerate(key_columns)]
+            if len(key_columns) == 1:
+                statement = statement.where(key_columns[0] > positions[0])
+            else:
+                statement = statement.where(tuple_(*key_columns) > tuple_(*positions))
+        statement = statement.order_by(*key_columns)
+        if kind != "export":
+            statement = statement.limit(limit)
+    statements[kind] = statement
+    return statement
+
+
+async def estimate_records(query: select, dbsession: AsyncSession, params: Optional[dict] = None) -> int:
+    """
+    Estimates the number of records returned by the query without running it. Unfiltered queries
+    read the table statistics from pg_class, filtered ones use the planner's row estimate
+    """
+    table = query.get_final_froms()[0]
+    if query.whereclause is None:
+        reltuples = await dbsession.scalar(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table_name AS regclass)"),
+            {"table_name": f"{table.schema}.{table.name}"}
+        )
+        # reltuples is -1 (or 0 on older servers) while the table has never been analyzed
+        if reltuples and reltuples > 0:
+            return reltuples
+    plan = await dbsession.scalar(Explain(query), params)
+    if isinstance(plan, str):
+        plan = orjson.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def count_records(query: select, dbsession: AsyncSession, mode: ModoContagem, params: Optional[dict] = None) -> Optional[int]:
+    """
+    Counts the records returned by the query using the requested strategy
+    """
+    if mode == ModoContagem.nenhuma:
+        return None
+    if mode == ModoContagem.estimada:
+        return await estimate_records(query, dbsession, params)
+
+    count_query = derive_statement(query, "count")
+    if mode == ModoContagem.cache:
+        # Memoize the exact count per filter set and data version. The filter engine builds one
+        # statement per table and filter names, so the table and the bound values identify it
+        tables = [table.name for table in query.get_final_froms()]
+        fingerprint = hashlib.sha1(orjson.dumps(params or {}, option=orjson.OPT_SORT_KEYS, default=str)).hexdigest()
+        key = f"contagem:{'.'.join(tables)}:{fingerprint}:v{data_versions.tag(tables)}"
+        total_records = await cache.get(key)
+        if total_records is None:
+            total_records = await dbsession.scalar(count_query, params)
+            await cache.set(key, total_records, expire=config.COUNT_CACHE_TTL)
+        return total_records
+    return await dbsession.scalar(count_query, params)
+
 
-    # Query items using the calculated offset and records per page
-    items_query = query.offset(offset).limit(records_per_page)
-    result = await dbsession.execute(items_query)            
-    items = result.scalars().all()    
+async def get_paginated_data(query: select, dbsession: AsyncSession, response_schema, current_page: int = 1, records_per_page: int = 10,
+                             cursor: Optional[str] = None, count_mode: ModoContagem = ModoContagem.exata, params: Optional[dict] = None):
+    # Statements run with bound parameters, so their SQL text is stable per filter set and the
+    # connection reuses the server-side prepared statement (see src/database.StatementCache)
+    params = dict(params or {})
+    # Select the plain table columns instead of the ORM entity, so rows come back as tuples
+    # and skip the identity map bookkeeping (and any refresh round-trip) entirely
+    table = query.get_final_froms()[0]
+    if query.column_descriptions[0].get("entity") is not None:
+        query = query.with_only_columns(*table.columns)
 
-    for item in items:
-        await dbsession.refresh(item)
+    # An exact count on offset pages is computed in the page query itself with a window function,
+    # saving the round-trip of a separate count statement
+    window_count = count_mode == ModoContagem.exata and cursor is None
+    key_values = None
+    if cursor is not None:
+        key_columns = list(table.primary_key.columns)
+        key_values = decode_cursor(cursor, len(key_columns))
+    if key_values is not None:
+        # Only the first cursor page is counted, so walking the table costs an index range scan per page
+        total_records = None
+    elif not window_count:
+        # Query total number of records
+        total_records = await count_records(query, dbsession, count_mode, params)
+
+    next_cursor = None
+    if cursor is None:
+        # Calculate the offset based on the current page and records per page
+        offset = (current_page - 1) * records_per_page
+        # Query items using the calculated offset and records per page
+        items_query = derive_statement(query, "page_window" if window_count else "page")
+        page_params = {**params, "_offset": offset, "_limit": records_per_page}
+    else:
+        # Keyset pagination: order by the primary key and start right after the cursor position,
+        # so each page is an index range scan instead of an offset scan
+        # Fetch one extra row to know whether there is a next page
+        page_params = {**params, "_limit": records_per_page + 1}
+        if key_values is None:
+            items_query = derive_statement(query, "keyset_start")
+        else:
+            items_query = derive_statement(query, "keyset")
+            page_params.update({f"_cursor_{i}": value for i, value in enumerate(key_values)})
+
+    result = await dbsession.execute(items_query, page_params)
+    # Rows are mapped straight to dicts, validated later against the endpoint's response model
+    items = [dict(row) for row in result.mappings()]
+
+    if window_count:
+        if items:
+            total_records = items[0][WINDOW_COUNT_LABEL]
+            for item in items:
+                del item[WINDOW_COUNT_LABEL]
+        elif offset == 0:
+            total_records = 0
+        else:
+            # A page past the end carries no window count, so fall back to counting separately
+            total_records = await count_records(query, dbsession, count_mode, params)
+
+    if cursor is not None and len(items) > records_per_page:
+        items = items[:records_per_page]
+        next_cursor = encode_cursor([items[-1][column.name] for column in key_columns])
+
+    # Calculate the last page number
+    last_page = ceil(total_records / records_per_page) if total_records is not None else None
           
     return response_schema(
             data=items,
             total_pages=last_page,
             total_items=total_records,
             page_number=current_page,
-            page_size=min(len(items), total_records)
+            page_size=len(items),
+            proximo_cursor=next_cursor,
+            contagem=count_mode
         )
 
 
+def child_relationships(model) -> list:
+    """
+    One-to-many relationships of a model, as (attribute, child model, parent key, child foreign key)
+    """
+    relationships = []
+    for relationship in sa_inspect(model).relationships:
+        if relationship.direction is ONETOMANY:
+            (parent_key, child_key), = relationship.local_remote_pairs
+            relationships.append((relationship.key, relationship.mapper.class_, parent_key.name, child_key))
+    return relationships
+
+
+def tree_tables(model) -> Tuple[str, ...]:
+    """
+    Tables read by the tree endpoint of a model: its own and those of all its descendants
+    """
+    tables = [model.__tablename__]
+    for _, child_model, _, _ in child_relationships(model):
+        tables += [table for table in tree_tables(child_model) if table not in tables]
+    return tuple(tables)
+
+
+def _tree_statement(column: Column, multiple: bool = False) -> select:
+    """
+    Select of the rows whose column matches one value (the root) or any value of a list (the
+    children of a level), built once per column
+    """
+    key = (column.table.fullname, column.name, multiple)
+    statement = _tree_statements.get(key)
+    if statement is None:
+        table = column.table
+        if multiple:
+            condition = column == any_(bindparam("_keys", type_=ARRAY(column.type)))
+        else:
+            condition = column == bindparam("_key", type_=column.type)
+        statement = _tree_statements[key] = select(*table.columns).where(condition).order_by(*table.primary_key.columns)
+    return statement
+
+
+async def get_tree_data(model, root_id: int, depth: int, dbsession: AsyncSession) -> Optional[dict]:
+    """
+    Loads a record and its dependents down to the given depth, following the model relationships.
+    Each level is loaded in batch, with one query per relationship for all the parents of the level.
+    Returns None if the root record does not exist
+    """
+    key_column, = model.__table__.primary_key.columns
+    result = await dbsession.execute(_tree_statement(key_column), {"_key": root_id})
+    root = result.mappings().first()
+    if root is None:
+        return None
+    root = dict(root)
+
+    level = [(model, [root])]
+    for _ in range(depth):
+        next_level = []
+        for parent_model, parents in level:
+            for attribute, child_model, parent_key, child_key in child_relationships(parent_model):
+                parents_by_key = {}
+                for parent in parents:
+                    parent[attribute] = []
+                    parents_by_key.setdefault(parent[parent_key], []).append(parent)
+                result = await dbsession.execute(_tree_statement(child_key, multiple=True), {"_keys": list(parents_by_key)})
+                children = [dict(row) for row in result.mappings()]
+                for child in children:
+                    for parent in parents_by_key[child[child_key.name]]:
+                        parent[attribute].append(child)
+                if children:
+                    next_level.append((child_model, children))
+        level = next_level
+    return root
+
+
+def _encode_batch(keys: list, rows: list, export_format: FormatoExportacao) -> bytes:
+    if export_format == FormatoExportacao.csv:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode()
+    return b"".join(orjson.dumps(dict(zip(keys, row))) + b"\n" for row in rows)
+
+
+async def fetch_batches(query: select, params: dict):
+    """
+    Yields the rows of the query in lists of EXPORT_BATCH_SIZE tuples read from a server-side cursor
+    """
+    # The request's session is closed before a streaming body is sent, so the stream owns its session
+    from main import db
+    async with db.async_session_maker() as session:
+        result = await session.stream(query, params, execution_options={"yield_per": config.EXPORT_BATCH_SIZE})
+        async for rows in result.partitions():
+            yield rows
+
+
+async def stream_records(query: select, params: dict, export_format: FormatoExportacao):
+    """
+    Streams the records of the query, ordered by primary key, as one encoded chunk per batch of rows
+    """
+    query = derive_statement(query, "export")
+    table = query.get_final_froms()[0]
+    batches = fetch_batches(query, params)
+    try:
+        if export_format in COLUMNAR_FORMATS:
+            async for chunk in encode_columnar(table, batches, export_format, [column.key for column in query.selected_columns]):
+                yield chunk
+        else:
+            keys = [column.key for column in query.selected_columns]
+            if export_format == FormatoExportacao.csv:
+                yield _encode_batch(keys, [keys], export_format)
+            async for rows in batches:
+                yield _encode_batch(keys, rows, export_format)
+    except Exception as e:
+        # The status line is already sent, so the truncated body is all the client can get
+        logger.error(f"Erro na exportação de {table.name}: {str(e)}")
+        raise
+
+
+def export_records(query: select, params: dict, export_format: FormatoExportacao, filename: str) -> StreamingResponse:
+    """
+    Builds the chunked response of an export endpoint. Memory use is bounded by one batch of rows
+    """
+    return StreamingResponse(stream_records(query, params, export_format),
+                             media_type=EXPORT_MEDIA_TYPES[export_format],
+                             headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format.value}"'})
+
+
 async def reset_minute_counters(request_stats:dict):
     while True:
         await asyncio.sleep(60)
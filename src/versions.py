@@ -0,0 +1,194 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Sequence
+import asyncio
+import logging
+import sys
+from appconfig import Settings
+from src import models
+from src.indexes import INDEX_LOCK_KEY
+
+config = Settings()
+logger = logging.getLogger(__name__)
+
+# Table holding the data version of each table, and channel announcing its changes
+VERSION_TABLE = "versao_dados"
+VERSION_CHANNEL = "versao_dados"
+VERSION_FUNCTION = "incrementa_versao_dados"
+
+_VERSION_SETUP = (
+    f"""CREATE TABLE IF NOT EXISTS {models.db_schema}.{VERSION_TABLE} (
+        tabela text PRIMARY KEY,
+        versao bigint NOT NULL DEFAULT 1,
+        atualizado_em timestamptz NOT NULL DEFAULT now())""",
+    # Statement-level trigger function: one bump per INSERT/UPDATE/DELETE/TRUNCATE statement
+    f"""CREATE OR REPLACE FUNCTION {models.db_schema}.{VERSION_FUNCTION}() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO {models.db_schema}.{VERSION_TABLE} AS v (tabela) VALUES (TG_TABLE_NAME)
+            ON CONFLICT (tabela) DO UPDATE SET versao = v.versao + 1, atualizado_em = now();
+            PERFORM pg_notify('{VERSION_CHANNEL}', TG_TABLE_NAME);
+            RETURN NULL;
+        END $$ LANGUAGE plpgsql""",
+)
+_BUMP = text(f"""INSERT INTO {models.db_schema}.{VERSION_TABLE} AS v (tabela) VALUES (:tabela)
+                 ON CONFLICT (tabela) DO UPDATE SET versao = v.versao + 1, atualizado_em = now()
+                 RETURNING versao, atualizado_em""")
+
+
+def data_tables() -> list:
+    return [table.name for table in models.BaseModel.metadata.sorted_tables if table.schema == models.db_schema]
+
+
+def versioned_tables() -> set:
+    """
+    Names that may carry a data version: the data tables and the aggregate views computed from them
+    """
+    from src.aggregates import AGGREGATES  # imports this module
+    return {*data_tables(), *(view.name for view in AGGREGATES.values())}
+
+
+class DataVersions:
+    """
+    Version of the data of each table, bumped by every data load. Cache keys embed the versions of
+    the tables an endpoint reads, so a load invalidates exactly the responses built from them.
+
+    Each worker keeps the versions in memory, reloading them when PostgreSQL notifies a bump on
+    VERSION_CHANNEL (and every DATA_VERSION_POLL_INTERVAL seconds, should a notification be lost).
+    """
+
+    def __init__(self):
+        self.versions: Dict[str, int] = {}
+        # When each version was bumped
+        self.modified: Dict[str, datetime] = {}
+        # Set once the versions are first loaded
+        self.loaded = asyncio.Event()
+        self._changed = asyncio.Event()
+        self._subscribers: List[Callable[[], Awaitable]] = []
+        self._tasks = set()
+
+    def subscribe(self, callback: Callable[[], Awaitable]):
+        """
+        Registers a coroutine function run in background whenever a reload finds new versions
+        """
+        self._subscribers.append(callback)
+
+    def tag(self, tables: Iterable[str]) -> str:
+        return ".".join(str(self.versions.get(table, 0)) for table in tables)
+
+    def tracks(self, tables: Sequence[str]) -> bool:
+        """
+        Whether every given table has a version row, so that its changes show in the versions
+        """
+        return bool(tables) and all(table in self.versions for table in tables)
+
+    def last_modified(self, tables: Iterable[str]) -> Optional[datetime]:
+        """
+        Latest change of the given tables, as far as their versions tell (None if never bumped)
+        """
+        return max((self.modified[table] for table in tables if table in self.modified), default=None)
+
+    async def load(self, conn: AsyncConnection):
+        result = await conn.execute(text(f"SELECT tabela, versao, atualizado_em FROM {models.db_schema}.{VERSION_TABLE}"))
+        rows = result.all()
+        self.versions = {row.tabela: row.versao for row in rows}
+        self.modified = {row.tabela: row.atualizado_em for row in rows}
+        self.loaded.set()
+
+    async def setup(self, engine: AsyncEngine):
+        """
+        Creates the version table and, when DATA_VERSION_TRIGGERS is set, the triggers bumping the
+        version of each table on every change of its data. Workers take turns, holding the lock of
+        the index builds, whose locks on the tables the triggers conflict with
+        """
+        async with engine.begin() as conn:
+            await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": INDEX_LOCK_KEY})
+            for statement in _VERSION_SETUP:
+                await conn.execute(text(statement))
+            if config.DATA_VERSION_TRIGGERS:
+                for table in data_tables():
+                    await conn.execute(text(f"DROP TRIGGER IF EXISTS {VERSION_TABLE} ON {models.db_schema}.{table}"))
+                    await conn.execute(text(
+                        f"CREATE TRIGGER {VERSION_TABLE} AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE "
+                        f"ON {models.db_schema}.{table} FOR EACH STATEMENT "
+                        f"EXECUTE FUNCTION {models.db_schema}.{VERSION_FUNCTION}()"))
+            await self.load(conn)
+
+    async def bump(self, engine: AsyncEngine, tables: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """
+        Bumps the version of the given tables (all of them by default), e.g. at the end of a data load.
+        Raises ValueError for names that are not versioned tables
+        """
+        tables = list(tables or data_tables())
+        unknown = set(tables) - versioned_tables()
+        if unknown:
+            raise ValueError(f"Tabelas desconhecidas: {', '.join(sorted(unknown))}")
+        bumped, modified = {}, {}
+        async with engine.begin() as conn:
+            for table in tables:
+                row = (await conn.execute(_BUMP, {"tabela": table})).one()
+                bumped[table], modified[table] = row.versao, row.atualizado_em
+                await conn.execute(text("SELECT pg_notify(:channel, :tabela)"), {"channel": VERSION_CHANNEL, "tabela": table})
+        self.versions.update(bumped)
+        self.modified.update(modified)
+        return bumped
+
+    def _notified(self, connection, pid, channel, payload):
+        self._changed.set()
+
+    async def listen(self, engine: AsyncEngine):
+        """
+        Keeps the versions current. Runs for the lifetime of the worker, holding one connection
+        """
+        previous = None
+        while True:
+            try:
+                async with engine.connect() as conn:
+                    listener = (await conn.get_raw_connection()).driver_connection
+                    await listener.add_listener(VERSION_CHANNEL, self._notified)
+                    try:
+                        while True:
+                            self._changed.clear()
+                            await self.load(conn)
+                            # Ends the read transaction, so the next load sees the new versions
+                            await conn.commit()
+                            if previous is not None and self.versions != previous:
+                                for callback in self._subscribers:
+                                    task = asyncio.create_task(callback())
+                                    self._tasks.add(task)
+                                    task.add_done_callback(self._tasks.discard)
+                            # A copy: bump() updates the versions in place
+                            previous = dict(self.versions)
+                            try:
+                                await asyncio.wait_for(self._changed.wait(), config.DATA_VERSION_POLL_INTERVAL)
+                                # Let a burst of notifications from a load settle into a single reload
+                                await asyncio.sleep(1)
+                            except asyncio.TimeoutError:
+                                pass
+                    finally:
+                        await listener.remove_listener(VERSION_CHANNEL, self._notified)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erro ao acompanhar as versões dos dados: {str(e)}")
+                await asyncio.sleep(config.DATA_VERSION_POLL_INTERVAL)
+
+
+data_versions = DataVersions()
+
+
+async def _bump_command(tables: list):
+    engine = create_async_engine(config.DATABASE_URL)
+    try:
+        for table, version in (await data_versions.bump(engine, tables)).items():
+            print(f"{table}: {version}")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    # Hook for the data load: python -m src.versions [tabela ...] (all tables when none is given)
+    try:
+        asyncio.run(_bump_command(sys.argv[1:]))
+    except ValueError as e:
+        sys.exit(str(e))
@@ -0,0 +1,152 @@
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from collections import Counter, deque
+from typing import Deque, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+import asyncio
+import datetime as dt
+import logging
+import re
+import time
+import uuid
+from appconfig import Settings
+from src.cache import cache
+from src.versions import data_versions
+
+config = Settings()
+logger = logging.getLogger(__name__)
+
+# Lock electing the single worker that warms the shared cache
+WARMUP_LOCK_KEY = "lock:aquecimento"
+# Requests kept in memory by each worker, complementing the access log
+HISTORY_SIZE = 10_000
+
+# e.g. 2025-03-10 13:10:33,050 - uvicorn.access - INFO - 127.0.0.1:48308 - "GET /plano_acao_especial?pagina=1 HTTP/1.1" 200
+_ACCESS_LINE = re.compile(r'^(?P<time>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}).*?"GET (?P<target>\S+) HTTP/[\d.]+" 200\b')
+
+# Successful GET requests served by this worker, as (timestamp, target)
+_history: Deque[Tuple[float, str]] = deque(maxlen=HISTORY_SIZE)
+warmup_stats = {"runs": 0, "requests": 0, "errors": 0, "last_run": None, "last_duration": None}
+
+
+def normalize_target(target: str) -> str:
+    """
+    Path and query string with the parameters sorted, so the same request is counted once
+    """
+    path, _, query = target.partition("?")
+    query = urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+    return f"{path}?{query}" if query else path
+
+
+def record_request(path: str, query: str):
+    _history.append((time.time(), f"{path}?{query}" if query else path))
+
+
+def _read_access_log(path: str, since: float) -> List[str]:
+    targets = []
+    with open(path, encoding="utf8", errors="replace") as log:
+        for line in log:
+            match = _ACCESS_LINE.match(line)
+            if match and dt.datetime.strptime(match["time"], "%Y-%m-%d %H:%M:%S").timestamp() >= since:
+                targets.append(match["target"])
+    return targets
+
+
+def _is_cached(app: FastAPI, path: str) -> bool:
+    return any(isinstance(route, APIRoute) and "GET" in route.methods and route.path_regex.match(path)
+               and hasattr(route.endpoint, "cache_key_prefix")
+               for route in app.router.routes)
+
+
+async def top_requests(app: FastAPI, limit: int, window: int) -> List[str]:
+    """
+    Most frequent requests to the cached endpoints over the last `window` seconds, taken from the
+    access log and from the requests served by this worker
+    """
+    since = time.time() - window
+    targets = [target for timestamp, target in _history if timestamp >= since]
+    if config.WARMUP_ACCESS_LOG:
+        try:
+            targets = [*targets, *await asyncio.to_thread(_read_access_log, config.WARMUP_ACCESS_LOG, since)]
+        except OSError as e:
+            logger.warning(f"Log de acesso indisponível para o aquecimento do cache: {str(e)}")
+    counts = Counter()
+    for target in targets:
+        if app.root_path and target.startswith(app.root_path + "/"):
+            target = target[len(app.root_path):]
+        counts[normalize_target(target)] += 1
+    return [target for target, _ in counts.most_common() if _is_cached(app, target.partition("?")[0])][:limit]
+
+
+async def replay(app: FastAPI, target: str) -> Optional[int]:
+    """
+    Serves a GET request in-process through the application routes, bypassing the middlewares,
+    and returns its status code. The response body is discarded; only the cache fill matters
+    """
+    path, _, query = target.partition("?")
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+             "path": path, "raw_path": path.encode(), "root_path": "", "query_string": query.encode(),
+             "headers": [], "client": None, "server": None, "app": app}
+    status_code = None
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+
+    await app.router(scope, receive, send)
+    return status_code
+
+
+async def warm_cache(app: FastAPI):
+    """
+    Replays the top WARMUP_TOP_N requests of the last WARMUP_WINDOW seconds, WARMUP_CONCURRENCY at
+    a time, for at most WARMUP_TIME_BUDGET seconds. A single worker warms the cache at a time
+    """
+    if not config.WARMUP_TOP_N:
+        return
+    token = uuid.uuid4().hex
+    if not await cache.set_lock(WARMUP_LOCK_KEY, token, expire=config.WARMUP_TIME_BUDGET):
+        return
+    start = time.monotonic()
+    semaphore = asyncio.Semaphore(config.WARMUP_CONCURRENCY)
+
+    async def warm(target: str):
+        async with semaphore:
+            try:
+                status_code = await replay(app, target)
+            except Exception as e:
+                status_code = None
+                logger.warning(f"Erro ao aquecer o cache com {target}: {str(e)}")
+            warmup_stats["requests"] += 1
+            if status_code != 200:
+                warmup_stats["errors"] += 1
+
+    try:
+        targets = await top_requests(app, config.WARMUP_TOP_N, config.WARMUP_WINDOW)
+        logger.info(f"Aquecendo o cache com {len(targets)} consultas...")
+        await asyncio.wait_for(asyncio.gather(*[warm(target) for target in targets]), config.WARMUP_TIME_BUDGET)
+    except asyncio.TimeoutError:
+        logger.warning(f"Aquecimento do cache interrompido após {config.WARMUP_TIME_BUDGET}s.")
+    except Exception as e:
+        logger.error(f"Erro ao aquecer o cache: {str(e)}")
+    finally:
+        await cache.unlock(WARMUP_LOCK_KEY, token)
+        warmup_stats["runs"] += 1
+        warmup_stats["last_run"] = dt.datetime.now().isoformat(timespec="seconds")
+        warmup_stats["last_duration"] = round(time.monotonic() - start, 3)
+
+
+async def warm_cache_at_startup(app: FastAPI, versions_timeout: float = 60):
+    """
+    Warms the cache once the data versions, embedded in the keys, are loaded
+    """
+    try:
+        await asyncio.wait_for(data_versions.loaded.wait(), versions_timeout)
+    except asyncio.TimeoutError:
+        logger.warning("Versões dos dados não carregadas; aquecimento do cache cancelado.")
+        return
+    await warm_cache(app)